@@ -2,7 +2,6 @@
 
 import logging
 import sys
-from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Tuple
 
@@ -14,13 +13,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.camera import create_frame_source
 from core.config import AppConfig
-from core.hailo_infer import HailoInfer
-from core.postproc import PostProcessor
-from core.tracking import create_tracker
+from core.hailo_line_proposer import HailoLineProposer
+from core.pipeline import get_pipeline
 from core.utils import safe_makedirs
 
 logger = logging.getLogger(__name__)
 
+# Downsample factor applied to the edge-detection ROI
+EDGE_DOWNSAMPLE = 2
+# Candidate lines scored per vectorized batch
+SCORE_CHUNK = 64
+# Sobel gradient magnitude counted as a strong-gradient pixel
+GRADIENT_THRESHOLD = 40
+# Minimum fraction of strong-gradient pixels before running Canny/Hough
+MIN_GRADIENT_DENSITY = 0.002
+
 
 class AutoCalibrator:
     """Auto-calibrate counting line from motion patterns."""
@@ -36,20 +43,53 @@ class AutoCalibrator:
         self.propose_top_k = config.autocal.propose_top_k
         self.min_flow_ratio = config.autocal.min_flow_ratio
         self.save_debug = config.autocal.save_debug
+        self.exact_length = config.autocal.exact_length
+        self.use_opencl = config.autocal.use_opencl
+        self.fast_blur = config.autocal.fast_blur
+
+        # Optional line proposer on the detection model's Hailo device, set up
+        # by run() for the line search; falls back to Canny/Hough
+        self.use_nn_lines = config.autocal.use_nn_lines
+        self.line_proposer = None
+
+        # Scratch buffers reused across calibration runs
+        self._heatmap = None
+        self._segments = None
+        self._gray_sum = None
+        self._gray = None
+        self._gray_n = 0
+        self._edges = None
+
+        # Trajectory buffer (struct of arrays): track row -> centroids
+        self._traj = np.zeros(
+            (config.autocal.max_tracks, config.autocal.max_track_len, 2), dtype=np.float32
+        )
+        self._tlen = np.zeros(config.autocal.max_tracks, dtype=np.int32)
+        self._row = {}  # track_id -> row in self._traj
+        self._dropped_tracks = set()  # Track ids that found the buffer full
+        self._trajectories = None  # Views returned by the last warmup
 
     def collect_warmup_data(
         self, camera, infer, postproc, tracker
-    ) -> Tuple[List[np.ndarray], List[Dict], Dict[int, List[Tuple]]]:
+    ) -> Tuple[np.ndarray | None, List[Dict], Dict[int, List[Tuple]]]:
         """Collect frames and track data during warmup.
 
+        Frames are folded into a running grayscale sum rather than stored.
+        Centroids are written into the preallocated trajectory buffer.
+
         Returns:
-            (frames, detections_list, track_trajectories)
+            (avg_frame, detections_list, track_trajectories)
         """
         logger.info(f"Collecting warmup data for {self.warmup_seconds} seconds...")
 
-        frames = []
+        self._gray_sum = None
+        self._gray_n = 0
+        self._row.clear()
+        self._dropped_tracks.clear()
+        self._tlen[:] = 0
+        dropped_points = 0
+        max_tracks, max_len = self._tlen.shape[0], self._traj.shape[1]
         detections_list = []
-        track_trajectories = defaultdict(list)  # track_id -> [(x, y), ...]
 
         import time
 
@@ -65,52 +105,111 @@ class AutoCalibrator:
             detections = postproc.process(raw_detections)
             tracked_dets = tracker.update(detections)
 
-            # Store frame (every Nth frame to save memory)
+            # Accumulate grayscale frame (every Nth frame)
             if frame_count % 10 == 0:
-                frames.append(frame_bgr.copy())
+                if self._gray_sum is None:
+                    self._gray_sum = np.zeros(frame_bgr.shape[:2], dtype=np.float32)
+                    self._gray = np.empty(frame_bgr.shape[:2], dtype=np.uint8)
+                cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY, dst=self._gray)
+                cv2.accumulate(self._gray, self._gray_sum)
+                self._gray_n += 1
 
             # Store detections
             detections_list.append(tracked_dets)
 
-            # Build trajectories
-            for det in tracked_dets:
-                x1, y1, x2, y2, _, _, track_id = det
-                centroid = ((x1 + x2) / 2, (y1 + y2) / 2)
-                track_trajectories[track_id].append(centroid)
+            # Build trajectories (all centroids of the frame at once)
+            if tracked_dets:
+                tracked = np.asarray(tracked_dets, dtype=np.float64).reshape(-1, 7)
+                centroids = 0.5 * (tracked[:, 0:2] + tracked[:, 2:4])
+                rows = np.fromiter(
+                    (self._track_row(int(t), max_tracks) for t in tracked[:, 6]),
+                    dtype=np.int32,
+                    count=len(tracked),
+                )
+                keep = rows >= 0  # Tracks beyond max_tracks are not recorded
+                rows, n = rows[keep], self._tlen[rows[keep]]
+                # A full track keeps overwriting its last slot, so its end point
+                # (used for flow direction) stays current
+                full = n >= max_len
+                dropped_points += int(full.sum())
+                self._traj[rows, np.minimum(n, max_len - 1)] = centroids[keep]
+                self._tlen[rows] = np.minimum(n + 1, max_len)
 
             frame_count += 1
 
+        # Zero-copy views into the trajectory buffer
+        track_trajectories = {
+            track_id: self._traj[row, : self._tlen[row]] for track_id, row in self._row.items()
+        }
+        self._trajectories = track_trajectories
+
         logger.info(f"Collected {frame_count} frames, {len(track_trajectories)} tracks")
-        return frames, detections_list, dict(track_trajectories)
+        if self._dropped_tracks:
+            logger.warning(
+                f"Trajectory buffer full: {len(self._dropped_tracks)} tracks not recorded "
+                f"(autocal.max_tracks={max_tracks})"
+            )
+        if dropped_points:
+            logger.warning(
+                f"Trajectory buffer full: {dropped_points} intermediate points replaced "
+                f"(autocal.max_track_len={max_len})"
+            )
+
+        avg_frame = None
+        if self._gray_n > 0:
+            avg_frame = (self._gray_sum / self._gray_n).astype(np.uint8)
+
+        return avg_frame, detections_list, track_trajectories
+
+    def _track_row(self, track_id: int, max_tracks: int) -> int:
+        """Row of a track in the trajectory buffer (-1 once it is full)."""
+        row = self._row.get(track_id)
+        if row is None:
+            if len(self._row) >= max_tracks:
+                self._dropped_tracks.add(track_id)
+                return -1
+            row = self._row[track_id] = len(self._row)
+        return row
 
     def build_motion_heatmap(
-        self, frames: List[np.ndarray], trajectories: Dict[int, List[Tuple]]
+        self, avg_frame: np.ndarray | None, trajectories: Dict[int, List[Tuple]]
     ) -> np.ndarray:
-        """Build motion heatmap from trajectories."""
-        if not frames:
-            return None
-
-        h, w = frames[0].shape[:2]
-        heatmap = np.zeros((h, w), dtype=np.float32)
+        """Build motion heatmap from trajectories.
 
-        # Draw trajectories as lines
-        for track_id, points in trajectories.items():
-            if len(points) < 2:
-                continue
+        Returns uint8 heatmap (0-255) or None if no frames were collected.
+        """
+        if avg_frame is None:
+            return None
 
-            # Draw line segments
-            for i in range(len(points) - 1):
-                pt1 = (int(points[i][0]), int(points[i][1]))
-                pt2 = (int(points[i + 1][0]), int(points[i + 1][1]))
-                cv2.line(heatmap, pt1, pt2, 1.0, 2)
+        h, w = avg_frame.shape[:2]
 
-        # Blur to smooth
-        heatmap = cv2.GaussianBlur(heatmap, (21, 21), 0)
+        # Reuse heatmap buffer across calibrations
+        if self._heatmap is None or self._heatmap.shape != (h, w):
+            self._heatmap = np.zeros((h, w), dtype=np.uint8)
+        else:
+            self._heatmap.fill(0)
+        heatmap = self._heatmap
+
+        # Draw all trajectories as polylines in a single call
+        polylines = [
+            np.asarray(points, dtype=np.int32).reshape(-1, 1, 2)
+            for points in trajectories.values()
+            if len(points) >= 2
+        ]
+        if polylines:
+            cv2.polylines(heatmap, polylines, isClosed=False, color=255, thickness=2)
+
+        # Blur to smooth (in place); 3 box passes approximate the 21x21 Gaussian
+        if self.fast_blur:
+            for _ in range(3):
+                cv2.boxFilter(heatmap, -1, (7, 7), dst=heatmap, borderType=cv2.BORDER_REPLICATE)
+        else:
+            cv2.GaussianBlur(heatmap, (21, 21), 0, dst=heatmap)
 
         if self.save_debug:
             debug_path = Path(self.config.ops.debug_dir) / "motion_heatmap.png"
             safe_makedirs(debug_path.parent)
-            cv2.imwrite(str(debug_path), (heatmap * 255).astype(np.uint8))
+            cv2.imwrite(str(debug_path), heatmap)
             logger.info(f"Saved motion heatmap to {debug_path}")
 
         return heatmap
@@ -123,22 +222,15 @@ class AutoCalibrator:
         Returns:
             (flow_stats, dominant_direction)
         """
-        flows = {"bar_to_counter": 0, "counter_to_bar": 0}
+        # Net displacement of each sufficiently long track
+        starts, ends = self._trajectory_endpoints(trajectories, min_len=5)
+        dy = ends[:, 1] - starts[:, 1]
 
-        for track_id, points in trajectories.items():
-            if len(points) < 5:
-                continue
-
-            # Compute average direction
-            start = np.array(points[0])
-            end = np.array(points[-1])
-            direction = end - start
-
-            # Assume horizontal line - check y component
-            if direction[1] < -10:  # Moving up
-                flows["bar_to_counter"] += 1
-            elif direction[1] > 10:  # Moving down
-                flows["counter_to_bar"] += 1
+        # Assume horizontal line - check y component
+        flows = {
+            "bar_to_counter": int(np.count_nonzero(dy < -10)),  # Moving up
+            "counter_to_bar": int(np.count_nonzero(dy > 10)),  # Moving down
+        }
 
         total = sum(flows.values())
         if total == 0:
@@ -155,24 +247,105 @@ class AutoCalibrator:
 
         return flows, dominant
 
+    def _trajectory_endpoints(
+        self, trajectories: Dict[int, List[Tuple]], min_len: int = 2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (start, end) points of trajectories with at least min_len points.
+
+        Reads straight from the trajectory buffer when given the trajectories
+        returned by collect_warmup_data.
+        """
+        if trajectories is self._trajectories:
+            lens = self._tlen[: len(self._row)]
+            rows = np.flatnonzero(lens >= min_len)
+            return self._traj[rows, 0], self._traj[rows, lens[rows] - 1]
+
+        ends = [
+            (points[0], points[-1]) for points in trajectories.values() if len(points) >= min_len
+        ]
+        if not ends:
+            return np.empty((0, 2), dtype=np.float32), np.empty((0, 2), dtype=np.float32)
+        ends = np.asarray(ends, dtype=np.float32)
+        return ends[:, 0], ends[:, 1]
+
     def find_candidate_lines(
-        self, frames: List[np.ndarray], trajectories: Dict[int, List[Tuple]]
+        self, avg_frame: np.ndarray | None, trajectories: Dict[int, List[Tuple]]
     ) -> List[Dict]:
-        """Find candidate lines using Hough transform on edge map."""
-        if not frames:
+        """Find candidate lines (Hailo line proposer, else Hough on edge map).
+
+        Args:
+            avg_frame: Mean grayscale warmup frame (stable edges)
+            trajectories: Track trajectories for scoring
+        """
+        if avg_frame is None:
             return []
 
-        # Average frames for stable edge detection
-        avg_frame = np.mean([cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames], axis=0).astype(
-            np.uint8
+        h, w = avg_frame.shape
+
+        lines = None
+        if self.line_proposer is not None:
+            lines = self.line_proposer.propose(avg_frame, top_k=4 * self.propose_top_k)
+        if lines is None or len(lines) == 0:
+            lines = self._hough_lines(avg_frame)
+
+        if lines is None or len(lines) == 0:
+            logger.warning("No candidate lines found")
+            return []
+
+        # Flatten trajectories into segments once for all candidates
+        self._segments = self._build_segments(trajectories)
+
+        # Filter: prefer horizontal lines
+        angle = np.abs(
+            np.degrees(np.arctan2(lines[:, 3] - lines[:, 1], lines[:, 2] - lines[:, 0]))
         )
+        lines = lines[(angle <= 15) | (angle >= 165)]
+
+        # Score all candidates in one pass
+        scores = self._score_lines(lines, self._segments, (w, h))
+        candidates = [
+            {
+                "start": [int(x1), int(y1)],
+                "end": [int(x2), int(y2)],
+                "score": float(score),
+            }
+            for (x1, y1, x2, y2), score in zip(lines.tolist(), scores.tolist())
+        ]
+
+        # Sort by score and return top-k
+        candidates.sort(key=lambda x: x["score"], reverse=True)
+        return candidates[: self.propose_top_k]
+
+    def _hough_lines(self, avg_frame: np.ndarray) -> np.ndarray | None:
+        """Canny + probabilistic Hough on the lower third (CPU/OpenCL path).
 
+        Returns (N, 4) int32 lines in full-resolution coordinates, or None.
+        """
         # Focus on lower third (where counter line typically is)
         h, w = avg_frame.shape
-        lower_third = avg_frame[int(2 * h / 3) :, :]
+        y0 = (2 * h) // 3
+
+        # Downsample the ROI before edge detection to cut Canny's memory traffic
+        roi_size = (w // EDGE_DOWNSAMPLE, (h - y0) // EDGE_DOWNSAMPLE)
+        roi = cv2.resize(avg_frame[y0:, :], roi_size, interpolation=cv2.INTER_AREA)
+
+        # Skip Canny/Hough when a coarse sample shows almost no gradient
+        # (area-averaged rather than strided so thin edges are not skipped)
+        sample = cv2.resize(roi, None, fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA)
+        density = self._gradient_density(sample)
+        if density < MIN_GRADIENT_DENSITY:
+            logger.warning(f"Edge density too low for line search ({density:.4f})")
+            return None
 
-        # Edge detection
-        edges = cv2.Canny(lower_third, 50, 150)
+        if self.use_opencl and cv2.ocl.haveOpenCL():
+            # Run Canny + Hough through the T-API (OpenCL) path
+            cv2.ocl.setUseOpenCL(True)
+            edges = cv2.Canny(cv2.UMat(roi), 50, 150)
+        else:
+            # Edge detection (into a reused output buffer)
+            if self._edges is None or self._edges.shape != roi.shape:
+                self._edges = np.empty(roi.shape, dtype=np.uint8)
+            edges = cv2.Canny(roi, 50, 150, edges=self._edges)
 
         if self.save_debug:
             debug_path = Path(self.config.ops.debug_dir) / "edge_map.png"
@@ -181,93 +354,157 @@ class AutoCalibrator:
 
         # Hough lines (prefer horizontal)
         lines = cv2.HoughLinesP(
-            edges, rho=1, theta=np.pi / 180, threshold=50, minLineLength=w // 3, maxLineGap=20
+            edges,
+            rho=1,
+            theta=np.pi / 180,
+            threshold=max(10, roi_size[0] // 25),
+            minLineLength=roi_size[0] // 3,
+            maxLineGap=20 // EDGE_DOWNSAMPLE,
         )
+        if isinstance(lines, cv2.UMat):
+            lines = lines.get()
 
-        if lines is None:
+        if lines is None or len(lines) == 0:
             logger.warning("No lines found in Hough transform")
-            return []
+            return None
+
+        # Scale back to full resolution and add lower-third offset
+        lines = lines.reshape(-1, 4).astype(np.int32) * EDGE_DOWNSAMPLE
+        lines[:, [1, 3]] += y0
+        return lines
 
-        # Convert to full image coordinates and filter
-        candidates = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            # Adjust y coordinates (add offset for lower third)
-            y1 += int(2 * h / 3)
-            y2 += int(2 * h / 3)
-
-            # Filter: prefer horizontal lines
-            angle = np.abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
-            if angle > 15 and angle < 165:  # Not horizontal enough
+    def _gradient_density(self, gray: np.ndarray) -> float:
+        """Fraction of pixels with a strong Sobel gradient."""
+        gx = cv2.Sobel(gray, cv2.CV_16S, 1, 0)
+        gy = cv2.Sobel(gray, cv2.CV_16S, 0, 1)
+        magnitude = cv2.add(cv2.convertScaleAbs(gx), cv2.convertScaleAbs(gy))
+        return np.count_nonzero(magnitude > GRADIENT_THRESHOLD) / magnitude.size
+
+    def _build_segments(
+        self, trajectories: Dict[int, List[Tuple]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Flatten trajectories into segment and owner arrays.
+
+        Returns:
+            (segments, track_index) where segments has shape (M, 2, 2) and
+            track_index maps each segment to its trajectory.
+        """
+        segs = []
+        owners = []
+        for idx, points in enumerate(trajectories.values()):
+            if len(points) < 2:
                 continue
+            pts = np.asarray(points, dtype=np.float32)
+            segs.append(np.stack([pts[:-1], pts[1:]], axis=1))
+            owners.append(np.full(len(pts) - 1, idx, dtype=np.int32))
 
-            # Score line
-            score = self._score_line((x1, y1, x2, y2), trajectories, (w, h))
-            candidates.append(
-                {
-                    "start": [int(x1), int(y1)],
-                    "end": [int(x2), int(y2)],
-                    "score": score,
-                }
-            )
+        if not segs:
+            return np.empty((0, 2, 2), dtype=np.float32), np.empty(0, dtype=np.int32)
 
-        # Sort by score and return top-k
-        candidates.sort(key=lambda x: x["score"], reverse=True)
-        return candidates[: self.propose_top_k]
+        return np.concatenate(segs), np.concatenate(owners)
 
-    def _score_line(
+    def _count_crossings(
+        self, segments: Tuple[np.ndarray, np.ndarray], lines: np.ndarray
+    ) -> np.ndarray:
+        """Count trajectories with at least one segment crossing each line.
+
+        Args:
+            segments: (segments, track_index) from _build_segments
+            lines: (K, 4) array of x1, y1, x2, y2
+
+        Returns:
+            (K,) array of crossing trajectory counts
+        """
+        lines = np.asarray(lines, dtype=np.float32).reshape(-1, 4)
+        counts = np.zeros(len(lines), dtype=np.int32)
+        segs, owners = segments
+        if len(segs) == 0 or len(lines) == 0:
+            return counts
+
+        ax, ay = segs[:, 0, 0], segs[:, 0, 1]
+        bx, by = segs[:, 1, 0], segs[:, 1, 1]
+
+        # First segment index of each trajectory (owners are sorted)
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+
+        # Bound the (K, M) temporaries by scoring lines in chunks
+        for i in range(0, len(lines), SCORE_CHUNK):
+            chunk = lines[i : i + SCORE_CHUNK]
+            x1, y1, x2, y2 = (chunk[:, j : j + 1] for j in range(4))
+
+            # Same CCW predicate as _segments_intersect, for all line/segment pairs
+            ccw_acd = (y2 - ay) * (x1 - ax) > (y1 - ay) * (x2 - ax)
+            ccw_bcd = (y2 - by) * (x1 - bx) > (y1 - by) * (x2 - bx)
+            ccw_abc = (y1 - ay) * (bx - ax) > (by - ay) * (x1 - ax)
+            ccw_abd = (y2 - ay) * (bx - ax) > (by - ay) * (x2 - ax)
+            hit = (ccw_acd != ccw_bcd) & (ccw_abc != ccw_abd)
+
+            # A trajectory counts once no matter how many segments cross
+            counts[i : i + SCORE_CHUNK] = np.logical_or.reduceat(hit, starts, axis=1).sum(axis=1)
+
+        return counts
+
+    def _score_lines(
         self,
-        line: Tuple[int, int, int, int],
-        trajectories: Dict[int, List[Tuple]],
+        lines: np.ndarray,
+        segments: Tuple[np.ndarray, np.ndarray],
         frame_size: Tuple[int, int],
-    ) -> float:
-        """Score a candidate line.
+    ) -> np.ndarray:
+        """Score candidate lines in one vectorized pass.
 
         Higher score = better line.
         """
-        x1, y1, x2, y2 = line
+        lines = np.asarray(lines, dtype=np.float64).reshape(-1, 4)
         w, h = frame_size
-
-        score = 0.0
+        x1, y1, x2, y2 = lines.T
 
         # 1. Alignment with flow separator (trajectories crossing)
-        crossings = 0
-        for track_id, points in trajectories.items():
-            if len(points) < 2:
-                continue
-
-            # Check if trajectory crosses line
-            for i in range(len(points) - 1):
-                p1, p2 = points[i], points[i + 1]
-                # Simple line intersection check
-                if self._segments_intersect((p1, p2), (x1, y1), (x2, y2)):
-                    crossings += 1
-                    break
-
-        score += crossings * 10.0
+        score = self._count_crossings(segments, lines) * 10.0
 
         # 2. Distance from borders (prefer middle region)
         mid_y = (y1 + y2) / 2
-        border_dist = min(mid_y, h - mid_y)
-        score += border_dist / 10.0
+        score += np.minimum(mid_y, h - mid_y) / 10.0
 
-        # 3. Length (prefer longer lines)
-        length = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        # 3. Length (prefer longer lines); (|dx| + |dy|) / 2 is enough to
+        # rank near-horizontal candidates unless exact_length is set
+        if self.exact_length:
+            length = np.hypot(x2 - x1, y2 - y1)
+        else:
+            length = 0.5 * (np.abs(x2 - x1) + np.abs(y2 - y1))
         score += length / 100.0
 
         return score
 
+    def _score_line(
+        self,
+        line: Tuple[int, int, int, int],
+        trajectories: Dict[int, List[Tuple]],
+        frame_size: Tuple[int, int],
+        segments: Tuple[np.ndarray, np.ndarray] | None = None,
+    ) -> float:
+        """Score a candidate line.
+
+        Higher score = better line.
+        """
+        if segments is None:
+            segments = self._build_segments(trajectories)
+        return float(self._score_lines(np.array([line]), segments, frame_size)[0])
+
     def _segments_intersect(
         self, seg1: Tuple[Tuple, Tuple], seg2_start: Tuple, seg2_end: Tuple
     ) -> bool:
         """Check if two line segments intersect."""
-        p1, p2 = seg1
-        p3, p4 = seg2_start, seg2_end
+        (ax, ay), (bx, by) = seg1
+        (cx, cy), (dx, dy) = seg2_start, seg2_end
 
-        def ccw(A, B, C):
-            return (C[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (C[0] - A[0])
+        # Orientation cross products; CCW when positive
+        c_acd = (dy - ay) * (cx - ax) - (cy - ay) * (dx - ax)
+        c_bcd = (dy - by) * (cx - bx) - (cy - by) * (dx - bx)
+        c_abc = (cy - ay) * (bx - ax) - (by - ay) * (cx - ax)
+        c_abd = (dy - ay) * (bx - ax) - (by - ay) * (dx - ax)
 
-        return ccw(p1, p3, p4) != ccw(p2, p3, p4) and ccw(p1, p2, p3) != ccw(p1, p2, p4)
+        # Branchless: XOR the orientation signs, no short-circuit
+        return bool(((c_acd > 0) ^ (c_bcd > 0)) & ((c_abc > 0) ^ (c_abd > 0)))
 
     def run(self, camera, infer, postproc, tracker) -> List[Dict]:
         """Run auto-calibration.
@@ -280,7 +517,7 @@ class AutoCalibrator:
         logger.info("Starting auto-calibration...")
 
         # Collect warmup data
-        frames, detections_list, trajectories = self.collect_warmup_data(
+        avg_frame, detections_list, trajectories = self.collect_warmup_data(
             camera, infer, postproc, tracker
         )
 
@@ -289,14 +526,16 @@ class AutoCalibrator:
             return []
 
         # Build motion heatmap
-        heatmap = self.build_motion_heatmap(frames, trajectories)
+        heatmap = self.build_motion_heatmap(avg_frame, trajectories)
 
         # Compute flow direction
         flow_stats, dominant_direction = self.compute_flow_vectors(trajectories)
         logger.info(f"Dominant flow direction: {dominant_direction} ({flow_stats})")
 
         # Find candidate lines
-        candidates = self.find_candidate_lines(frames, trajectories)
+        if self.use_nn_lines:
+            self.line_proposer = HailoLineProposer(self.config, infer)
+        candidates = self.find_candidate_lines(avg_frame, trajectories)
 
         # Add direction to candidates
         for candidate in candidates:
@@ -320,9 +559,7 @@ def main():
     camera = None
     try:
         camera = create_frame_source(config)
-        infer = HailoInfer(config)
-        postproc = PostProcessor(config)
-        tracker = create_tracker(config)
+        infer, postproc, tracker = get_pipeline(config)
 
         calibrator = AutoCalibrator(config)
         candidates = calibrator.run(camera, infer, postproc, tracker)
@@ -1,6 +1,9 @@
 """Backfill/replay tool for processing video files."""
 
+import queue
 import sys
+import threading
+from datetime import timedelta
 from pathlib import Path
 
 import cv2
@@ -10,13 +13,91 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.config import AppConfig
 from core.counting import LineCounter
-from core.hailo_infer import HailoInfer
-from core.postproc import PostProcessor
+from core.pipeline import get_pipeline
 from core.storage import Storage
-from core.tracking import create_tracker
 from core.utils import now_utc
 
 
+def _opencv_frames(cap):
+    """Yield BGR frames from a cv2.VideoCapture."""
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        yield frame
+
+
+def _pyav_frames(container):
+    """Yield BGR frames decoded by PyAV (FFmpeg, threaded decode)."""
+    for frame in container.decode(video=0):
+        yield frame.to_ndarray(format="bgr24")
+
+
+def _open_pyav(path: str, hwaccel: str | None):
+    """Open a video with PyAV, optionally with a hardware decoder.
+
+    Returns (container, fps, total_frames) or None if PyAV is unavailable.
+    """
+    try:
+        import av
+    except ImportError:
+        print("PyAV not installed, falling back to OpenCV decode")
+        return None
+
+    container = None
+    if hwaccel:
+        try:
+            from av.codec.hwaccel import HWAccel
+
+            accel = HWAccel(device_type=hwaccel, allow_software_fallback=True)
+            container = av.open(path, hwaccel=accel)
+        except (ImportError, av.FFmpegError) as e:
+            print(f"Hardware decoder unavailable ({e}), using software decode")
+
+    if container is None:
+        try:
+            container = av.open(path)
+        except av.FFmpegError as e:
+            print(f"PyAV failed to open video ({e}), falling back to OpenCV decode")
+            return None
+
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"
+    fps = int(stream.average_rate or 0)
+    return container, fps, stream.frames
+
+
+def _reader_worker(
+    frames, frame_queue: queue.Queue, stop_event: threading.Event, errors: list
+):
+    """Read frames on a background thread so decode overlaps inference.
+
+    A decode error is appended to errors for main() to raise; the end
+    marker is queued either way so the consumer never blocks.
+    """
+    try:
+        for frame in frames:
+            if stop_event.is_set():
+                break
+            frame_queue.put(frame)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        frame_queue.put(None)  # End of stream
+
+
+def _next_batch(frame_queue: queue.Queue, batch_size: int) -> list:
+    """Pop up to batch_size frames; returns fewer only at end of stream."""
+    batch = []
+    while len(batch) < batch_size:
+        frame = frame_queue.get()
+        if frame is None:
+            frame_queue.put(None)  # Keep end marker for the next call
+            break
+        batch.append(frame)
+    return batch
+
+
 def main():
     """Backfill main function."""
     import argparse
@@ -25,6 +106,11 @@ def main():
     parser.add_argument("video", type=str, help="Input video file")
     parser.add_argument("--config", type=str, default="configs/site-default.yaml", help="Config file")
     parser.add_argument("--output", type=str, help="Output CSV file (default: auto-generated)")
+    parser.add_argument("--batch", type=int, default=8, help="Frames per inference batch")
+    parser.add_argument(
+        "--decoder", choices=["opencv", "pyav"], default="opencv", help="Video decode backend"
+    )
+    parser.add_argument("--hwaccel", type=str, help="PyAV hardware decoder (e.g. v4l2m2m, cuda)")
     args = parser.parse_args()
 
     # Load config
@@ -37,52 +123,79 @@ def main():
     print(f"Processing video: {args.video}")
 
     # Open video
-    cap = cv2.VideoCapture(args.video)
-    if not cap.isOpened():
-        print(f"Failed to open video: {args.video}")
-        return 1
-
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap = None
+    pyav = _open_pyav(args.video, args.hwaccel) if args.decoder == "pyav" else None
+    if pyav is not None:
+        container, fps, total_frames = pyav
+        frames = _pyav_frames(container)
+    else:
+        cap = cv2.VideoCapture(args.video, cv2.CAP_FFMPEG)
+        if not cap.isOpened():
+            print(f"Failed to open video: {args.video}")
+            return 1
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frames = _opencv_frames(cap)
+
+    fps = fps or config.camera.fps
+    total_frames = total_frames or 1
     print(f"Video: {total_frames} frames @ {fps} fps")
 
     # Initialize components
-    infer = HailoInfer(config)
-    postproc = PostProcessor(config)
-    tracker = create_tracker(config)
+    infer, postproc, tracker = get_pipeline(config)
     counter = LineCounter(config)
     storage = Storage(config)
 
     print("Processing frames...")
     frame_count = 0
+    batch_size = max(1, args.batch)
+
+    # Decode on a background thread, bounded to a couple of batches
+    frame_queue = queue.Queue(maxsize=batch_size * 2)
+    stop_event = threading.Event()
+    reader_errors = []
+    reader = threading.Thread(
+        target=_reader_worker,
+        args=(frames, frame_queue, stop_event, reader_errors),
+        daemon=True,
+    )
+    reader.start()
+
+    # Event timestamps follow video time from the start of processing
+    start_utc = now_utc()
 
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            frames = _next_batch(frame_queue, batch_size)
+            if not frames:
                 break
 
-            frame_count += 1
-            if frame_count % 100 == 0:
-                progress = (frame_count / total_frames) * 100
-                print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames})")
+            # Inference (one device call per batch)
+            batch_detections = infer.infer_batch(frames)
 
-            # Inference
-            raw_detections = infer.infer(frame)
+            for raw_detections in batch_detections:
+                frame_count += 1
+                if frame_count % 100 == 0:
+                    progress = (frame_count / total_frames) * 100
+                    print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames})")
 
-            # Post-process
-            detections = postproc.process(raw_detections)
+                # Post-process
+                detections = postproc.process(raw_detections)
 
-            # Track
-            tracked_dets = tracker.update(detections)
+                # Track
+                tracked_dets = tracker.update(detections)
 
-            # Count
-            timestamp_utc = now_utc()
-            events = counter.update(tracked_dets, timestamp_utc)
+                # Count
+                timestamp_utc = start_utc + timedelta(seconds=(frame_count - 1) / fps)
+                events = counter.update(tracked_dets, timestamp_utc)
 
-            # Store events
-            if events:
-                storage.write_events(events)
+                # Store events
+                if events:
+                    storage.write_events(events)
+
+        if reader_errors:
+            raise RuntimeError(f"Video decode failed: {reader_errors[0]}") from reader_errors[0]
 
         # Flush storage
         storage.stop()
@@ -118,8 +231,18 @@ def main():
         traceback.print_exc()
         return 1
     finally:
-        cap.release()
-        infer.close()
+        stop_event.set()
+        # Unblock the reader if it is waiting on a full queue
+        while reader.is_alive():
+            try:
+                frame_queue.get_nowait()
+            except queue.Empty:
+                pass
+            reader.join(timeout=0.1)
+        if cap is not None:
+            cap.release()
+        else:
+            container.close()
         storage.stop()
 
     return 0
@@ -1,6 +1,8 @@
 """Calibration tool for setting counting line."""
 
 import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
 import cv2
@@ -15,8 +17,19 @@ from core.overlay import annotate
 from core.counting import LineCounter
 from core.utils import safe_makedirs
 
+# Drawing constants
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+POINT_COLOR = (0, 255, 0)
+
+# Preview refresh interval (s) and key poll (ms) while waiting for clicks
+PREVIEW_INTERVAL = 0.2
+CLICK_POLL_MS = 50
+
+# Mock track sweep period (frames) for the live counter preview
+MOCK_PERIOD = 200
+
 # Global state for mouse callback
-_calib_state = {"points": [], "config": None, "counter": None}
+_calib_state = {"points": [], "config": None, "counter": None, "dirty": True}
 
 
 def mouse_callback(event, x, y, flags, param):
@@ -24,6 +37,7 @@ def mouse_callback(event, x, y, flags, param):
     if event == cv2.EVENT_LBUTTONDOWN:
         if len(_calib_state["points"]) < 2:
             _calib_state["points"].append((x, y))
+            _calib_state["dirty"] = True
             print(f"Point {len(_calib_state['points'])}: ({x}, {y})")
 
 
@@ -77,29 +91,42 @@ def main():
         points = []
         start_time = cv2.getTickCount()
 
-        while len(points) < 2:
-            frame, _ = next(frame_gen)
+        # Reused display buffer (avoids a full-frame allocation per iteration)
+        display = np.empty_like(frame)
 
-            # Draw current points
-            display = frame.copy()
-            for i, pt in enumerate(_calib_state["points"]):
-                cv2.circle(display, pt, 5, (0, 255, 0), -1)
-                cv2.putText(
-                    display,
-                    f"P{i+1}",
-                    (pt[0] + 10, pt[1]),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (0, 255, 0),
-                    2,
-                )
-
-            # Draw line if both points set
-            if len(_calib_state["points"]) == 2:
-                cv2.line(display, _calib_state["points"][0], _calib_state["points"][1], (0, 255, 0), 2)
+        last_draw = 0.0
 
-            cv2.imshow("Calibration", display)
-            key = cv2.waitKey(1) & 0xFF
+        while len(points) < 2:
+            # Redraw only on a click or at the preview interval
+            now = time.monotonic()
+            if _calib_state["dirty"] or now - last_draw >= PREVIEW_INTERVAL:
+                frame, _ = next(frame_gen)
+
+                # Draw current points
+                np.copyto(display, frame)
+                for i, pt in enumerate(_calib_state["points"]):
+                    cv2.circle(display, pt, 5, POINT_COLOR, -1)
+                    cv2.putText(
+                        display,
+                        f"P{i+1}",
+                        (pt[0] + 10, pt[1]),
+                        FONT,
+                        0.7,
+                        POINT_COLOR,
+                        2,
+                    )
+
+                # Draw line if both points set
+                if len(_calib_state["points"]) == 2:
+                    cv2.line(
+                        display, _calib_state["points"][0], _calib_state["points"][1], POINT_COLOR, 2
+                    )
+
+                cv2.imshow("Calibration", display)
+                _calib_state["dirty"] = False
+                last_draw = now
+
+            key = cv2.waitKey(CLICK_POLL_MS) & 0xFF
             if key == ord("q"):
                 print("Cancelled")
                 return 1
@@ -123,25 +150,25 @@ def main():
         end_time = start_time + args.duration * cv2.getTickFrequency()
         frame_count = 0
 
+        # Simple mock detections for calibration (moving box), precomputed
+        # for one sweep period. In real use, this would come from inference
+        mock_x = 100 + np.arange(MOCK_PERIOD)
+        mock_y = np.full_like(mock_x, h // 2)
+        mock_boxes = np.stack([mock_x - 30, mock_y - 30, mock_x + 30, mock_y + 30], axis=1)
+        mock_tracks = [(*box, 0.8, 41, 1) for box in mock_boxes.tolist()]  # track_id=1
+
         while cv2.getTickCount() < end_time:
             frame, _ = next(frame_gen)
 
-            # Simple mock detections for calibration (moving box)
-            # In real use, this would come from inference
-            mock_x = int(100 + (frame_count % 200))
-            mock_y = h // 2
-            mock_box = (mock_x - 30, mock_y - 30, mock_x + 30, mock_y + 30)
-            mock_track = (*mock_box, 0.8, 41, 1)  # track_id=1
+            mock_track = mock_tracks[frame_count % MOCK_PERIOD]
 
             # Update counter
-            from datetime import datetime, timezone
-
             counter.update([mock_track], datetime.now(timezone.utc))
             totals = counter.totals()
 
             # Draw overlay
             stats = {"in": totals["in"], "out": totals["out"], "net": totals["net"], "fps": 30.0}
-            display = annotate(frame, [mock_track], counter, stats)
+            display = annotate(frame, [mock_track], counter, stats, dst=display)
 
             cv2.imshow("Calibration", display)
             key = cv2.waitKey(1) & 0xFF
@@ -2,9 +2,12 @@
 
 import argparse
 import logging
+import queue
 import signal
 import sys
+import threading
 import time
+from collections import deque
 from pathlib import Path
 
 import cv2
@@ -13,23 +16,97 @@ import numpy as np
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from apps.auto_calibrate import AutoCalibrator
 from core.camera import create_frame_source
 from core.config import AppConfig
 from core.counting import LineCounter
-from core.drift import DriftMonitor
-from core.hailo_infer import HailoInfer
+from core.hailo_infer import HailoInfer, InferBatcher
 from core.metrics import Metrics
 from core.overlay import annotate
 from core.postproc import PostProcessor
-from core.roi import ROIMasker
 from core.storage import Storage
 from core.tracking import create_tracker
-from core.utils import now_utc
 from webui.api import start_web_server
 
-# Global state for web UI
-_shared_state = {"frame": None, "stats": {}, "last_update": 0}
+# Pipeline queue depth between stages (small to bound latency)
+PIPELINE_QUEUE_SIZE = 2
+
+# Inference batches submitted to the device ahead of their results
+INFER_IN_FLIGHT = 2
+
+# Minimum interval (ns) between web UI state updates
+UI_PUBLISH_INTERVAL_NS = 250_000_000
+
+# Weight of the newest frame interval in the smoothed FPS
+FPS_SMOOTHING = 0.02
+
+
+def _put_drop_oldest(q: queue.Queue, item, metrics=None):
+    """Put item, discarding the oldest queued item if the queue is full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+                if metrics:
+                    metrics.increment_dropped()
+            except queue.Empty:
+                pass
+
+
+def _drift_frame(frame_bgr: np.ndarray, size) -> np.ndarray:
+    """Downscale a frame for drift analysis."""
+    return cv2.resize(frame_bgr, size, interpolation=cv2.INTER_AREA)
+
+
+def _drift_worker(drift_monitor, drift_q, drift_results, stop_event):
+    """Drift stage: SSIM/edge/brightness analysis off the main loop."""
+    logger = logging.getLogger(__name__)
+    while not stop_event.is_set():
+        try:
+            kind, frame_small = drift_q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            if kind == "reference":
+                drift_monitor.set_reference(frame_small)
+            else:
+                _put_drop_oldest(drift_results, drift_monitor.update(frame_small))
+        except Exception as e:
+            logger.error(f"Drift worker error: {e}", exc_info=True)
+
+
+def _infer_worker(batcher, camera, infer_q, infer_lock, stop_event, metrics):
+    """Inference stage: run the model on the newest camera frames into infer_q.
+
+    Up to INFER_IN_FLIGHT batches are submitted ahead, so the device works
+    on the next batch while results of the previous one are handed on.
+    """
+    logger = logging.getLogger(__name__)
+    pending = deque()  # (items, token) in submission order
+    dropped_seen = 0
+    try:
+        ended = False
+        while not ended and not stop_event.is_set():
+            items, ended = batcher.next_batch(camera)
+            # Frames the camera replaced before we got to them
+            dropped = camera.dropped_frames
+            if dropped > dropped_seen:
+                metrics.increment_dropped(dropped - dropped_seen)
+                dropped_seen = dropped
+            if items:
+                with infer_lock:
+                    pending.append((items, batcher.begin([frame for frame, _ in items])))
+            # Drain down to the in-flight limit, or fully when input is idle
+            while pending and (len(pending) >= INFER_IN_FLIGHT or not items or ended):
+                done_items, token = pending.popleft()
+                for (frame_bgr, timestamp_ns), raw_detections in zip(done_items, batcher.end(token)):
+                    _put_drop_oldest(infer_q, (frame_bgr, timestamp_ns, raw_detections), metrics)
+    except Exception as e:
+        logger.error(f"Inference worker error: {e}", exc_info=True)
+    finally:
+        _put_drop_oldest(infer_q, None)  # End of stream
 
 
 def setup_logging(log_level: str = "INFO"):
@@ -70,6 +147,8 @@ def main():
     logger.info(f"Headless: {args.headless}")
 
     # Initialize components
+    stop_event = threading.Event()
+    workers = []
     camera = None
     infer = None
     tracker = None
@@ -103,20 +182,31 @@ def main():
         counter = LineCounter(config)
         logger.info("Line counter initialized")
 
+        # Optional features are imported only when enabled (keeps startup
+        # light when they are switched off in the config)
+
         # Drift monitor
-        drift_monitor = DriftMonitor(config)
-        logger.info("Drift monitor initialized")
+        if config.drift.enabled:
+            from core.drift import DriftMonitor
+
+            drift_monitor = DriftMonitor(config)
+            logger.info("Drift monitor initialized")
 
         # ROI masker
-        roi_masker = ROIMasker(config)
-        if roi_masker.enabled:
+        if config.roi.enabled:
+            from core.roi import ROIMasker
+
+            roi_masker = ROIMasker(config)
             roi_masker.set_line(
                 tuple(config.counting.line.start), tuple(config.counting.line.end)
             )
             logger.info("ROI masker initialized")
 
         # Auto-calibrator
-        auto_calibrator = AutoCalibrator(config) if config.autocal.enabled else None
+        if config.autocal.enabled:
+            from apps.auto_calibrate import AutoCalibrator
+
+            auto_calibrator = AutoCalibrator(config)
 
         # Storage
         storage = Storage(config)
@@ -126,18 +216,18 @@ def main():
         metrics = Metrics(port=config.ops.metrics_port)
         logger.info("Metrics initialized")
 
-        # Web UI (in background thread)
-        web_server = start_web_server(config, _shared_state)
+        # Web UI (in a child process, previews handed over in shared memory)
+        web_server = start_web_server(config)
         logger.info(f"Web UI started on port {config.ui.http_port}")
 
         # Auto-calibration on startup
-        if auto_calibrator and config.autocal.enabled:
+        if auto_calibrator:
             logger.info("Running auto-calibration...")
             candidates = auto_calibrator.run(camera, infer, postproc, tracker)
 
             if candidates:
                 metrics.increment_autocal_runs()
-                _shared_state["autocal_candidates"] = candidates
+                web_server.update(autocal_candidates=candidates)
 
                 # Auto-apply if confident and enabled
                 if (
@@ -153,7 +243,7 @@ def main():
                     # Update counter and ROI
                     counter.line_start = tuple(best["start"])
                     counter.line_end = tuple(best["end"])
-                    if roi_masker.enabled:
+                    if roi_masker:
                         roi_masker.set_line(tuple(best["start"]), tuple(best["end"]))
 
                     auto_applied = True
@@ -166,32 +256,96 @@ def main():
 
         # Signal handlers for graceful shutdown
         def signal_handler(sig, frame):
-            logger.info("Shutdown signal received")
+            # No logging here: the signal can land inside a logging call and
+            # re-enter its stream. The KeyboardInterrupt handlers log it.
             raise KeyboardInterrupt
 
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
 
+        # Pipeline: capture and inference threads feed the post-processing
+        # loop below. Tracker, counter and ROI state stay on this thread.
+        batcher = InferBatcher(
+            infer,
+            config.model.batch_size,
+            config.model.batch_max_wait_ms,
+            static_threshold=config.model.static_frame_threshold,
+            static_refresh=config.model.static_refresh_frames,
+        )
+        infer_q = queue.Queue(maxsize=max(PIPELINE_QUEUE_SIZE, config.model.batch_size))
+        infer_lock = threading.Lock()
+        # The camera's own capture thread keeps only the newest frame, so a
+        # slow stage drops stale frames instead of building latency
+        camera.start_capture()
+        workers = [
+            threading.Thread(
+                target=_infer_worker,
+                args=(batcher, camera, infer_q, infer_lock, stop_event, metrics),
+                name="infer",
+                daemon=True,
+            ),
+        ]
+        # Drift analysis runs on downscaled frames in its own thread
+        drift_size = tuple(config.drift.downsample_wh)
+        drift_every_n = config.drift.sample_every_n
+        drift_q = queue.Queue(maxsize=1)
+        drift_results = queue.Queue(maxsize=1)
+        if drift_monitor:
+            workers.append(
+                threading.Thread(
+                    target=_drift_worker,
+                    args=(drift_monitor, drift_q, drift_results, stop_event),
+                    name="drift",
+                    daemon=True,
+                )
+            )
+
+        for worker in workers:
+            worker.start()
+
         # Main loop
         logger.info("Entering main loop...")
+        log_debug = logger.isEnabledFor(logging.DEBUG)  # Level is fixed after setup
         frame_count = 0
-        start_time = time.time()
         reference_set = False
+        prev_ns = None
+        frame_dt_ns = None  # Smoothed inter-frame interval
+        last_ui_publish_ns = 0
+        last_frame_publish_ns = 0
+        frame_publish_ns = int(1e9 / config.ui.overlay_fps)
+        overlay_buf = None
+
+        # Running totals, mutated in place every frame
+        stats = {"in": 0, "out": 0, "net": 0, "fps": 0.0}
+
+        while True:
+            item = infer_q.get()
+            if item is None:
+                break
+            frame_bgr, timestamp_ns, raw_detections = item
 
-        for frame_bgr, timestamp_ns in camera.frames():
             try:
                 frame_count += 1
-                timestamp_utc = now_utc()
+                now_ns = time.monotonic_ns()  # Single clock read for loop timing
 
                 # Set reference frame on first frame
-                if drift_monitor and drift_monitor.enabled and not reference_set:
-                    drift_monitor.set_reference(frame_bgr)
+                if drift_monitor and not reference_set:
+                    drift_q.put(("reference", _drift_frame(frame_bgr, drift_size)))
                     reference_set = True
 
-                # Drift monitoring (every 30 frames)
-                drift_metrics = {}
-                if drift_monitor and drift_monitor.enabled and frame_count % 30 == 0:
-                    drift_metrics = drift_monitor.update(frame_bgr)
+                # Drift monitoring (every sample_every_n frames, on the drift thread)
+                if drift_monitor and frame_count % drift_every_n == 0:
+                    try:
+                        drift_q.put_nowait(("update", _drift_frame(frame_bgr, drift_size)))
+                    except queue.Full:
+                        pass  # Previous frame still being analysed
+
+                # Pick up drift results published since the last frame
+                try:
+                    drift_metrics = drift_results.get_nowait()
+                except queue.Empty:
+                    drift_metrics = {}
+                if drift_metrics:
                     metrics.update_drift_ssim(drift_metrics.get("ssim", 1.0))
                     metrics.update_edge_iou(drift_metrics.get("edge_iou", 1.0))
                     metrics.update_brightness_var(drift_metrics.get("brightness_var", 0.0))
@@ -200,7 +354,18 @@ def main():
                     if drift_monitor.should_recalibrate() and auto_calibrator:
                         logger.warning("Drift detected, triggering recalibration...")
                         metrics.increment_recalibrations()
-                        candidates = auto_calibrator.run(camera, infer, postproc, tracker)
+                        # Pause the capture/inference stages while recalibrating
+                        with infer_lock:
+                            candidates = []
+                            try:
+                                if camera.stop_capture():
+                                    candidates = auto_calibrator.run(
+                                        camera, infer, postproc, tracker
+                                    )
+                                else:
+                                    logger.error("Capture did not stop, skipping recalibration")
+                            finally:
+                                camera.start_capture()
                         if candidates:
                             best = candidates[0]
                             config.counting.line.start = best["start"]
@@ -208,89 +373,104 @@ def main():
                             config.to_yaml(args.config)
                             counter.line_start = tuple(best["start"])
                             counter.line_end = tuple(best["end"])
-                            if roi_masker.enabled:
+                            if roi_masker:
                                 roi_masker.set_line(tuple(best["start"]), tuple(best["end"]))
-                            drift_monitor.set_reference(frame_bgr)
+                            drift_q.put(("reference", _drift_frame(frame_bgr, drift_size)))
                             drift_monitor.mark_recalibrated()
                             logger.info("Recalibration complete")
 
                 # ROI masking (optional)
-                if roi_masker and roi_masker.enabled:
+                if roi_masker:
                     roi_masker.update_skip_counter()
-                    # Check if detections would be clipped (before inference)
-                    # For now, apply mask to frame
-                    frame_for_infer = frame_bgr
-                else:
-                    frame_for_infer = frame_bgr
-
-                # Inference
-                raw_detections = infer.infer(frame_for_infer)
 
                 # Post-process
                 detections = postproc.process(raw_detections)
 
                 # Check ROI clipping
-                if roi_masker and roi_masker.enabled:
+                if roi_masker:
                     roi_masker.check_detection_clipping(detections, frame_bgr.shape)
 
                 # Track
                 tracked_dets = tracker.update(detections)
+                if log_debug:
+                    logger.debug(
+                        "frame=%d dets=%d tracks=%d", frame_count, len(detections), len(tracked_dets)
+                    )
 
                 # Count
-                events = counter.update(tracked_dets, timestamp_utc)
+                in_before, out_before = counter.in_count, counter.out_count
+                events = counter.update(tracked_dets)  # Wall time stamped per event
 
                 # Store events
                 if events:
                     storage.write_events(events)
-                    for event in events:
-                        if event["direction"] == "in":
-                            metrics.increment_in()
-                        else:
-                            metrics.increment_out()
+                    # One increment per direction per frame, from the counter deltas
+                    in_delta = counter.in_count - in_before
+                    out_delta = counter.out_count - out_before
+                    if in_delta:
+                        metrics.increment_in(in_delta)
+                    if out_delta:
+                        metrics.increment_out(out_delta)
 
                 # Update metrics
                 metrics.increment_frames()
                 metrics.update_active_tracks(len(tracked_dets))
 
                 # ROI coverage
-                if roi_masker and roi_masker.enabled:
+                if roi_masker:
                     metrics.update_roi_coverage(roi_masker.get_coverage())
 
-                # Calculate FPS
-                elapsed = time.time() - start_time
-                fps = frame_count / elapsed if elapsed > 0 else 0.0
+                # Calculate FPS (exponentially smoothed inter-frame interval)
+                if prev_ns is not None:
+                    dt_ns = now_ns - prev_ns
+                    frame_dt_ns = (
+                        dt_ns
+                        if frame_dt_ns is None
+                        else (1 - FPS_SMOOTHING) * frame_dt_ns + FPS_SMOOTHING * dt_ns
+                    )
+                prev_ns = now_ns
+                fps = 1e9 / frame_dt_ns if frame_dt_ns else 0.0
                 metrics.update_fps(fps)
 
-                # Get totals
-                totals = counter.totals()
-                stats = {
-                    "in": totals["in"],
-                    "out": totals["out"],
-                    "net": totals["net"],
-                    "fps": fps,
-                }
-
-                # Draw overlay
-                if config.ui.draw_overlays and not args.headless:
-                    annotated_frame = annotate(
-                        frame_bgr,
-                        tracked_dets,
-                        counter,
-                        stats,
-                        roi_masker=roi_masker,
-                        drift_metrics=drift_metrics,
-                        auto_applied=auto_applied,
+                # Update totals in place (read by the overlay)
+                stats["in"] = counter.in_count
+                stats["out"] = counter.out_count
+                stats["net"] = counter.in_count - counter.out_count
+                stats["fps"] = fps
+
+                # Draw overlay and publish the preview frame at the UI rate only
+                if now_ns - last_frame_publish_ns >= frame_publish_ns:
+                    if config.ui.draw_overlays and not args.headless:
+                        # Publishing copies the frame out, so one buffer suffices
+                        if overlay_buf is None or overlay_buf.shape != frame_bgr.shape:
+                            overlay_buf = np.empty_like(frame_bgr)
+                        annotated_frame = annotate(
+                            frame_bgr,
+                            tracked_dets,
+                            counter,
+                            stats,
+                            roi_masker=roi_masker,
+                            drift_metrics=drift_metrics,
+                            auto_applied=auto_applied,
+                            dst=overlay_buf,
+                        )
+                    else:
+                        annotated_frame = frame_bgr
+
+                    web_server.publish_frame(annotated_frame)
+                    last_frame_publish_ns = now_ns
+
+                if drift_metrics:
+                    web_server.update(drift_metrics=drift_metrics)
+
+                # Totals and bookkeeping only need UI refresh granularity
+                if now_ns - last_ui_publish_ns >= UI_PUBLISH_INTERVAL_NS:
+                    web_server.update(
+                        stats=dict(stats),
+                        last_update=time.time(),
+                        last_recal_time=drift_monitor.last_recal_time if drift_monitor else None,
                     )
-                else:
-                    annotated_frame = frame_bgr
-
-                # Update shared state for web UI
-                _shared_state["frame"] = annotated_frame
-                _shared_state["stats"] = stats
-                _shared_state["last_update"] = time.time()
-                _shared_state["drift_metrics"] = drift_metrics
-                if drift_monitor:
-                    _shared_state["last_recal_time"] = drift_monitor.last_recal_time
+                    last_ui_publish_ns = now_ns
 
                 # Save debug video if enabled
                 # (implementation would use VideoWriter)
@@ -299,7 +479,7 @@ def main():
                 logger.info("Interrupted by user")
                 break
             except Exception as e:
-                logger.error(f"Error in main loop: {e}", exc_info=True)
+                logger.error("Error in main loop: %s", e, exc_info=True)
                 metrics.increment_dropped()
                 time.sleep(0.1)
 
@@ -311,7 +491,11 @@ def main():
     finally:
         # Cleanup
         logger.info("Cleaning up...")
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1.0)
         if camera:
+            camera.stop_capture()
             camera.close()
         if infer:
             infer.close()
@@ -320,8 +504,7 @@ def main():
         if metrics:
             metrics.stop()
         if web_server:
-            # Stop web server (would need proper shutdown)
-            pass
+            web_server.close()
 
         logger.info("Shutdown complete")
 
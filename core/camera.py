@@ -1,15 +1,40 @@
 """Camera abstraction for multiple sources (Picamera2, OpenCV, GStreamer)."""
 
+import functools
 import logging
+import sys
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Generator, Tuple
+from typing import Generator, Optional, Tuple
 
-import cv2
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Preallocated rotation buffers; frames() callers own a slot until the next
+# ring_size captures (the capture thread allocates, see _frame_buffer)
+FRAME_RING_SIZE = 8
+
+# Seconds to wait for the capture thread to exit when stopping it
+CAPTURE_STOP_TIMEOUT = 2.0
+
+# cv2.rotate codes by rotation angle (ROTATE_90_CLOCKWISE, ROTATE_180,
+# ROTATE_90_COUNTERCLOCKWISE); literal so the module does not import cv2
+ROTATE_CODES = {
+    90: 0,
+    180: 1,
+    270: 2,
+}
+
+
+@functools.cache
+def _cv2():
+    """Import OpenCV on first use (unrotated Picamera2 capture never needs it)."""
+    import cv2
+
+    return cv2
+
 
 class FrameSource(ABC):
     """Abstract frame source."""
@@ -22,12 +47,107 @@ class FrameSource(ABC):
         self._frame_count = 0
         self._start_time = time.time()
         self._last_frame_time = None
+        self._missed_deadlines = 0
+        self.ring_size = FRAME_RING_SIZE
+        self._rot_ring = None  # Rotation output buffers (ring_size slots)
+        self._rot_index = 0
+
+        # Latest-frame slot filled by the capture thread (see start_capture)
+        self._latest = None
+        self._latest_lock = threading.Lock()
+        self._new_frame = threading.Event()
+        self._capture_thread = None
+        self._capture_stop = threading.Event()
+        self.capture_ended = False
+        self.published_frames = 0
+        self.consumed_frames = 0
 
     @abstractmethod
     def frames(self) -> Generator[Tuple[np.ndarray, int], None, None]:
         """Yield (frame_bgr, timestamp_ns) tuples."""
         pass
 
+    def start_capture(self) -> None:
+        """Capture on a background thread, keeping only the newest frame."""
+        if self._capture_thread is not None:
+            if not self._capture_stop.is_set():
+                return  # Already capturing
+            # An earlier stop timed out: never run two readers on one camera
+            self._capture_thread.join(timeout=CAPTURE_STOP_TIMEOUT)
+            if self._capture_thread.is_alive():
+                logger.error("Previous capture thread still running, not starting another")
+                return
+            self._capture_thread = None
+        self._capture_stop.clear()
+        self.capture_ended = False
+        self._capture_thread = threading.Thread(
+            target=self._capture_loop, name="capture", daemon=True
+        )
+        self._capture_thread.start()
+
+    def stop_capture(self) -> bool:
+        """Stop the capture thread (frames() may then be used directly).
+
+        Returns False if the thread is still running after the timeout,
+        e.g. blocked in the camera driver. Its handle is kept, and frames()
+        must not be read until a later stop_capture() or start_capture()
+        has seen it exit.
+        """
+        if self._capture_thread is None:
+            return True
+        self._capture_stop.set()
+        self._capture_thread.join(timeout=CAPTURE_STOP_TIMEOUT)
+        if self._capture_thread.is_alive():
+            logger.error(f"Capture thread did not stop within {CAPTURE_STOP_TIMEOUT}s")
+            return False
+        self._capture_thread = None
+        return True
+
+    def _capture_loop(self) -> None:
+        """Publish every captured frame to the latest-frame slot."""
+        frames = self.frames()
+        try:
+            for item in frames:
+                with self._latest_lock:
+                    self._latest = item
+                    self.published_frames += 1
+                self._new_frame.set()
+                if self._capture_stop.is_set():
+                    return
+            logger.info("Camera stream ended")
+        except Exception as e:
+            logger.error(f"Capture thread error: {e}", exc_info=True)
+        finally:
+            frames.close()
+            if not self._capture_stop.is_set():
+                self.capture_ended = True
+                self._new_frame.set()  # Wake a waiting consumer
+
+    def latest(self, timeout: float = 1.0) -> Optional[Tuple[np.ndarray, int]]:
+        """Get the newest frame not yet returned.
+
+        Frames overwritten before being read are dropped; see dropped_frames.
+        The capture thread never reuses a frame's buffer, so the caller may
+        keep it.
+
+        Returns:
+            (frame_bgr, timestamp_ns), or None if no new frame arrived in time
+        """
+        if not self._new_frame.wait(timeout):
+            return None
+        with self._latest_lock:
+            self._new_frame.clear()
+            item, self._latest = self._latest, None
+            if item is None:
+                return None
+            self.consumed_frames += 1
+        return item
+
+    @property
+    def dropped_frames(self) -> int:
+        """Captured frames that were superseded before being read."""
+        return self.published_frames - self.consumed_frames - (self._latest is not None)
+
     @abstractmethod
     def close(self) -> None:
         """Release resources."""
@@ -40,17 +160,53 @@ class FrameSource(ABC):
         elapsed = time.time() - self._start_time
         return self._frame_count / elapsed if elapsed > 0 else 0.0
 
+    def _wait_deadline(self, deadline: float, interval: float) -> float:
+        """Sleep until a monotonic deadline and return the next one.
+
+        Deadlines that have already passed are skipped instead of being
+        caught up in a burst, so a stall does not grow the latency.
+        """
+        now = time.monotonic()
+        if deadline > now:
+            time.sleep(deadline - now)
+        else:
+            missed = int((now - deadline) // interval)
+            self._missed_deadlines += missed
+            deadline += missed * interval
+        return deadline + interval
+
+    def _frame_buffer(self, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Get an output buffer for a rotated frame.
+
+        frames() callers get preallocated ring slots. Frames from the capture
+        thread go on through latest() and may be held indefinitely, so they
+        get a fresh array instead of a slot the next captures would overwrite.
+        """
+        if threading.current_thread() is self._capture_thread:
+            return np.empty(shape, dtype=dtype)
+
+        if self._rot_ring is None or self._rot_ring.shape[1:] != shape:
+            self._rot_ring = np.empty((self.ring_size, *shape), dtype=dtype)
+        dst = self._rot_ring[self._rot_index]
+        self._rot_index = (self._rot_index + 1) % len(self._rot_ring)
+        return dst
+
     def _rotate_frame(self, frame: np.ndarray) -> np.ndarray:
-        """Rotate frame if needed."""
-        if self.rotate == 0:
+        """Rotate frame if needed, in one pass into a _frame_buffer()."""
+        code = ROTATE_CODES.get(self.rotate)
+        if code is None:
             return frame
-        elif self.rotate == 90:
-            return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-        elif self.rotate == 180:
-            return cv2.rotate(frame, cv2.ROTATE_180)
-        elif self.rotate == 270:
-            return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        return frame
+
+        h, w = frame.shape[:2]
+        shape = (w, h, *frame.shape[2:]) if self.rotate in (90, 270) else frame.shape
+        dst = self._frame_buffer(shape, frame.dtype)
+
+        cv2 = _cv2()
+        if self.rotate == 180:
+            cv2.flip(frame, -1, dst=dst)  # Single contiguous pass
+        else:
+            cv2.rotate(frame, code, dst=dst)
+        return dst
 
 
 class Picamera2Source(FrameSource):
@@ -59,9 +215,11 @@ class Picamera2Source(FrameSource):
     def __init__(self, width: int, height: int, fps: int, rotate: int = 0):
         super().__init__(width, height, fps, rotate)
         try:
-            from picamera2 import Picamera2
+            from picamera2 import MappedArray, Picamera2
 
+            self._mapped_array = MappedArray
             self.camera = Picamera2()
+            # libcamera "RGB888" is stored as B, G, R bytes: OpenCV's BGR layout
             config = self.camera.create_video_configuration(
                 main={"size": (width, height), "format": "RGB888"},
                 controls={"FrameRate": fps},
@@ -77,22 +235,36 @@ class Picamera2Source(FrameSource):
 
     def frames(self) -> Generator[Tuple[np.ndarray, int], None, None]:
         """Yield frames from Picamera2."""
-        frame_time_ns = time.time_ns()
+        frame_interval = 1.0 / self.fps
+        deadline = time.monotonic()
         while True:
             try:
-                array = self.camera.capture_array()
-                # Convert RGB to BGR for OpenCV
-                frame_bgr = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
-                frame_bgr = self._rotate_frame(frame_bgr)
+                deadline = self._wait_deadline(deadline, frame_interval)
+                frame_bgr = self._capture()
                 self._frame_count += 1
                 self._last_frame_time = time.time_ns()
                 yield (frame_bgr, self._last_frame_time)
-                # Throttle to target FPS
-                time.sleep(1.0 / self.fps)
             except Exception as e:
                 logger.error(f"Picamera2 frame capture error: {e}")
                 time.sleep(0.1)
 
+    def _capture(self) -> np.ndarray:
+        """Copy the next camera buffer out in a single pass.
+
+        Unrotated frames are make_array()'s own copy; rotated ones are
+        rotated straight from the mapped buffer. The libcamera request is
+        released right away, so the camera never waits on downstream
+        consumers. Frames are already BGR.
+        """
+        request = self.camera.capture_request()
+        try:
+            if ROTATE_CODES.get(self.rotate) is None:
+                return request.make_array("main")
+            with self._mapped_array(request, "main") as mapped:
+                return self._rotate_frame(mapped.array)
+        finally:
+            request.release()
+
     def close(self) -> None:
         """Stop camera."""
         try:
@@ -105,13 +277,23 @@ class Picamera2Source(FrameSource):
 class OpenCVSource(FrameSource):
     """OpenCV (USB) camera or video file source."""
 
-    def __init__(self, index: int | str, width: int, height: int, fps: int, rotate: int = 0):
+    def __init__(
+        self,
+        index: int | str,
+        width: int,
+        height: int,
+        fps: int,
+        rotate: int = 0,
+        fourcc: str = "MJPG",
+    ):
         super().__init__(width, height, fps, rotate)
+        cv2 = _cv2()
         self.index = index
         self.is_file = isinstance(index, str)
         
         # OpenCV can accept either int (camera) or str (file path)
-        self.cap = cv2.VideoCapture(index)
+        use_v4l2 = not self.is_file and sys.platform.startswith("linux")
+        self.cap = cv2.VideoCapture(index, cv2.CAP_V4L2 if use_v4l2 else cv2.CAP_ANY)
         if not self.cap.isOpened():
             raise RuntimeError(f"Failed to open {'video file' if self.is_file else 'camera'}: {index}")
 
@@ -125,10 +307,16 @@ class OpenCVSource(FrameSource):
             logger.info(f"Video file opened: {index}")
             logger.info(f"Video properties: {actual_width}x{actual_height} @ {actual_fps:.2f}fps, {total_frames} frames")
         else:
-            # For cameras, set properties
+            # For cameras, set properties. The pixel format goes first: YUYV
+            # caps USB2 cameras at a few fps at 1080p, MJPG is decoded by
+            # OpenCV's libjpeg-turbo.
+            if fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
             self.cap.set(cv2.CAP_PROP_FPS, fps)
+            # Keep the driver queue short so reads return the latest frame
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             self.actual_fps = fps
             logger.info(f"OpenCV camera {index} initialized: {width}x{height} @ {fps}fps")
 
@@ -136,15 +324,17 @@ class OpenCVSource(FrameSource):
         """Yield frames from OpenCV camera or video file."""
         # Use actual FPS from video file if available, otherwise use configured FPS
         frame_interval = 1.0 / self.actual_fps
-        last_frame_time = time.time()
+        deadline = time.monotonic()
 
         while True:
+            # Pace reads on a fixed monotonic schedule (from video file or configured FPS)
+            deadline = self._wait_deadline(deadline, frame_interval)
             ret, frame = self.cap.read()
             if not ret:
                 if self.is_file:
                     # End of video - loop back to start
                     logger.info("End of video file reached, looping...")
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    self.cap.set(_cv2().CAP_PROP_POS_FRAMES, 0)
                     continue
                 else:
                     logger.warning("Failed to read frame from camera")
@@ -156,12 +346,6 @@ class OpenCVSource(FrameSource):
             self._frame_count += 1
             self._last_frame_time = timestamp_ns
 
-            # Throttle to actual FPS (from video file or configured)
-            elapsed = time.time() - last_frame_time
-            if elapsed < frame_interval:
-                time.sleep(frame_interval - elapsed)
-            last_frame_time = time.time()
-
             yield (frame, timestamp_ns)
 
     def close(self) -> None:
@@ -174,6 +358,7 @@ class GStreamerSource(FrameSource):
 
     def __init__(self, pipeline: str, width: int, height: int, fps: int, rotate: int = 0):
         super().__init__(width, height, fps, rotate)
+        cv2 = _cv2()
         self.pipeline_str = pipeline
         # For now, fall back to OpenCV with GStreamer backend
         logger.warning("GStreamer source using OpenCV backend")
@@ -184,9 +369,10 @@ class GStreamerSource(FrameSource):
     def frames(self) -> Generator[Tuple[np.ndarray, int], None, None]:
         """Yield frames from GStreamer."""
         frame_interval = 1.0 / self.fps
-        last_frame_time = time.time()
+        deadline = time.monotonic()
 
         while True:
+            deadline = self._wait_deadline(deadline, frame_interval)
             ret, frame = self.cap.read()
             if not ret:
                 logger.warning("Failed to read frame from GStreamer")
@@ -198,11 +384,6 @@ class GStreamerSource(FrameSource):
             self._frame_count += 1
             self._last_frame_time = timestamp_ns
 
-            elapsed = time.time() - last_frame_time
-            if elapsed < frame_interval:
-                time.sleep(frame_interval - elapsed)
-            last_frame_time = time.time()
-
             yield (frame, timestamp_ns)
 
     def close(self) -> None:
@@ -219,9 +400,11 @@ def create_frame_source(config) -> FrameSource:
     rotate = config.camera.rotate
 
     if source_type == "picamera2":
-        return Picamera2Source(width, height, fps, rotate)
+        source = Picamera2Source(width, height, fps, rotate)
     elif source_type == "opencv":
-        return OpenCVSource(config.camera.index, width, height, fps, rotate)
+        source = OpenCVSource(
+            config.camera.index, width, height, fps, rotate, fourcc=config.camera.fourcc
+        )
     elif source_type == "gstreamer":
         # Default pipeline - can be customized
         pipeline = (
@@ -229,7 +412,9 @@ def create_frame_source(config) -> FrameSource:
             f"video/x-raw,width={width},height={height},framerate={fps}/1 ! "
             "videoconvert ! appsink"
         )
-        return GStreamerSource(pipeline, width, height, fps, rotate)
+        source = GStreamerSource(pipeline, width, height, fps, rotate)
     else:
         raise ValueError(f"Unknown camera source: {source_type}")
 
+    return source
+
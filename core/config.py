@@ -1,14 +1,37 @@
 """Configuration management with Pydantic models."""
 
+import functools
+import hashlib
 import os
+import pickle
+import sys
 from pathlib import Path
 from typing import List, Literal
 
+import pydantic
 import yaml
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+# libyaml-backed loader/dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
-class CameraConfig(BaseModel):
+# Validated configs are pickled per config file under $XDG_CACHE_HOME (or
+# ~/.cache), in this directory, and reused while the file is unchanged
+CONFIG_CACHE_NAME = "cups-counter"
+
+
+class _ConfigModel(BaseModel):
+    """Base for config sections.
+
+    Schemas are built on first validation rather than at import, so a
+    config served from the cache never builds them.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class CameraConfig(_ConfigModel):
     """Camera configuration."""
 
     source: Literal["picamera2", "gstreamer", "opencv"] = "picamera2"
@@ -17,6 +40,7 @@ class CameraConfig(BaseModel):
     height: int = 720
     fps: int = 30
     rotate: int = Field(default=0, ge=0, le=270)
+    fourcc: str = Field(default="MJPG", pattern=r"^(|\w{4})$")  # "" = driver default
 
     @field_validator("rotate")
     @classmethod
@@ -27,7 +51,7 @@ class CameraConfig(BaseModel):
         return v
 
 
-class ModelConfig(BaseModel):
+class ModelConfig(_ConfigModel):
     """Model configuration."""
 
     hef_path: str = "./models/yolov8n_coco.hef"
@@ -36,9 +60,13 @@ class ModelConfig(BaseModel):
     iou_thresh: float = Field(default=0.45, ge=0.0, le=1.0)
     max_detections: int = Field(default=50, ge=1)
     mock_mode: bool = False
+    batch_size: int = Field(default=1, ge=1, le=16)
+    batch_max_wait_ms: float = Field(default=20.0, ge=0.0)
+    static_frame_threshold: float = Field(default=0.0, ge=0.0)
+    static_refresh_frames: int = Field(default=10, ge=1)
 
 
-class TrackingConfig(BaseModel):
+class TrackingConfig(_ConfigModel):
     """Tracking configuration."""
 
     type: Literal["bytetrack", "ocsort"] = "bytetrack"
@@ -48,14 +76,14 @@ class TrackingConfig(BaseModel):
     lost_ttl: int = Field(default=30, ge=1)
 
 
-class LineConfig(BaseModel):
+class LineConfig(_ConfigModel):
     """Line configuration for counting."""
 
     start: List[int] = Field(default=[100, 360], min_length=2, max_length=2)
     end: List[int] = Field(default=[1180, 360], min_length=2, max_length=2)
 
 
-class CountingConfig(BaseModel):
+class CountingConfig(_ConfigModel):
     """Counting configuration."""
 
     line: LineConfig = Field(default_factory=LineConfig)
@@ -64,7 +92,7 @@ class CountingConfig(BaseModel):
     min_visible_frames: int = Field(default=3, ge=1)
 
 
-class StorageConfig(BaseModel):
+class StorageConfig(_ConfigModel):
     """Storage configuration."""
 
     sqlite_path: str = "./data/cups.db"
@@ -85,16 +113,17 @@ class StorageConfig(BaseModel):
         return v
 
 
-class UIConfig(BaseModel):
+class UIConfig(_ConfigModel):
     """UI configuration."""
 
     http_port: int = Field(default=8080, ge=1, le=65535)
     preview: bool = True
     draw_overlays: bool = True
+    overlay_fps: float = Field(default=10.0, gt=0.0)
     timezone: str = "Asia/Baku"
 
 
-class OpsConfig(BaseModel):
+class OpsConfig(_ConfigModel):
     """Operations configuration."""
 
     save_debug_video: bool = False
@@ -103,7 +132,7 @@ class OpsConfig(BaseModel):
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
 
 
-class AutoCalConfig(BaseModel):
+class AutoCalConfig(_ConfigModel):
     """Auto-calibration configuration."""
 
     enabled: bool = True
@@ -112,9 +141,16 @@ class AutoCalConfig(BaseModel):
     auto_apply_if_confident: bool = False
     min_flow_ratio: float = Field(default=0.6, ge=0.0, le=1.0)
     save_debug: bool = True
+    max_tracks: int = Field(default=512, ge=1)
+    max_track_len: int = Field(default=1024, ge=2)
+    exact_length: bool = False
+    use_opencl: bool = False
+    fast_blur: bool = True
+    use_nn_lines: bool = False
+    line_hef_path: str = "./models/line_proposer.hef"
 
 
-class ROIConfig(BaseModel):
+class ROIConfig(_ConfigModel):
     """ROI (Region of Interest) configuration."""
 
     enabled: bool = True
@@ -122,7 +158,7 @@ class ROIConfig(BaseModel):
     margin_px: int = Field(default=24, ge=0)
 
 
-class DriftConfig(BaseModel):
+class DriftConfig(_ConfigModel):
     """Drift monitoring configuration."""
 
     enabled: bool = True
@@ -131,9 +167,11 @@ class DriftConfig(BaseModel):
     brightness_var_min: float = Field(default=6.0, ge=0.0)
     re_calibrate_on_drift: bool = True
     min_minutes_between_recal: int = Field(default=60, ge=1)
+    downsample_wh: List[int] = Field(default=[320, 180], min_length=2, max_length=2)
+    sample_every_n: int = Field(default=30, ge=1)
 
 
-class TunerGridConfig(BaseModel):
+class TunerGridConfig(_ConfigModel):
     """Parameter grid for tuning."""
 
     conf_thresh: List[float] = Field(default=[0.30, 0.35, 0.40])
@@ -141,7 +179,7 @@ class TunerGridConfig(BaseModel):
     min_box_area: List[int] = Field(default=[120, 150, 180])
 
 
-class TunerConfig(BaseModel):
+class TunerConfig(_ConfigModel):
     """Parameter tuning configuration."""
 
     enabled: bool = True
@@ -150,6 +188,7 @@ class TunerConfig(BaseModel):
     grid: TunerGridConfig = Field(default_factory=TunerGridConfig)
     optimize_for: Literal["stable_crossings", "min_double_counts"] = "stable_crossings"
     keep_best_profile: bool = True
+    workers: int = Field(default=1, ge=0)  # grid processes; 0 = one per CPU
 
     @field_validator("run_time")
     @classmethod
@@ -164,21 +203,21 @@ class TunerConfig(BaseModel):
         return v
 
 
-class AuditConfig(BaseModel):
+class AuditConfig(_ConfigModel):
     """Audit/thumbnail configuration."""
 
     thumbnails_per_day: int = Field(default=50, ge=0)
     thumb_size: List[int] = Field(default=[128, 128], min_length=2, max_length=2)
 
 
-class POSConfig(BaseModel):
+class POSConfig(_ConfigModel):
     """POS reconciliation configuration."""
 
     recon_enabled: bool = True
     pos_csv_dir: str = "./data/pos"
 
 
-class AppConfig(BaseModel):
+class AppConfig(_ConfigModel):
     """Main application configuration."""
 
     camera: CameraConfig = Field(default_factory=CameraConfig)
@@ -202,10 +241,22 @@ class AppConfig(BaseModel):
         if not path.exists():
             raise FileNotFoundError(f"Config file not found: {path}")
 
-        with open(path, "r") as f:
-            data = yaml.safe_load(f)
+        cache_path, stamp = _cache_entry(path)
+        try:
+            with open(cache_path, "rb") as f:
+                cached_stamp, config = pickle.load(f)
+            if cached_stamp == stamp and isinstance(config, cls):
+                return config
+        except Exception:
+            pass  # Missing, unreadable or unpicklable cache: a miss, parse below
 
-        return cls(**data)
+        # libyaml reads bytes directly, skipping a Python-side decode
+        with open(path, "rb") as f:
+            data = yaml.load(f, Loader=YAML_LOADER)
+
+        config = cls.model_validate(data)
+        _write_cache(cache_path, stamp, config)
+        return config
 
     def to_yaml(self, path: str | Path) -> None:
         """Save configuration to YAML file."""
@@ -213,7 +264,9 @@ class AppConfig(BaseModel):
         path.parent.mkdir(parents=True, exist_ok=True)
 
         with open(path, "w") as f:
-            yaml.dump(self.model_dump(), f, default_flow_style=False, sort_keys=False)
+            yaml.dump(
+                self.model_dump(), f, Dumper=YAML_DUMPER, default_flow_style=False, sort_keys=False
+            )
 
     @classmethod
     def from_env_override(cls, base_config: "AppConfig") -> "AppConfig":
@@ -223,5 +276,42 @@ class AppConfig(BaseModel):
         # Example: CUPS_MOCK_MODE=true
         if os.getenv("CUPS_MOCK_MODE", "").lower() == "true":
             config_dict["model"]["mock_mode"] = True
-        return cls(**config_dict)
-
+        return cls.model_validate(config_dict)
+
+
+@functools.cache
+def _code_stamp() -> str:
+    """Stamp for the code a pickled config depends on.
+
+    Covers the Python and pydantic versions and every module of the core
+    package (the tree has no package version), so upgrades and schema edits
+    invalidate cached models.
+    """
+    sources = sorted(Path(__file__).parent.glob("*.py"))
+    latest = max(source.stat().st_mtime_ns for source in sources)
+    return f"{sys.version_info[:3]}|{pydantic.VERSION}|{len(sources)}|{latest}"
+
+
+def _cache_entry(path: Path) -> tuple:
+    """Get (cache file, validity stamp) for a config file.
+
+    The stamp covers the file's mtime and size and _code_stamp(), so edits
+    to the YAML or the code invalidate the cached model.
+    """
+    st = path.stat()
+    stamp = f"{st.st_mtime_ns}|{st.st_size}|{_code_stamp()}"
+    cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    name = hashlib.blake2b(str(path.resolve()).encode(), digest_size=16).hexdigest()
+    return cache_dir / CONFIG_CACHE_NAME / f"cfg-{name}.pkl", stamp
+
+
+def _write_cache(cache_path: Path, stamp: str, config: AppConfig) -> None:
+    """Atomically store a validated config (best effort, e.g. read-only home)."""
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump((stamp, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
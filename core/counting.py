@@ -1,10 +1,11 @@
 """Line crossing detection for counting cups."""
 
 import logging
-from collections import defaultdict
+import math
+from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
-from core.utils import centroid, segment_intersect
+from core.utils import now_utc
 
 logger = logging.getLogger(__name__)
 
@@ -14,184 +15,207 @@ TrackedDetection = Tuple[float, float, float, float, float, int, int]
 # Event format
 Event = Dict[str, any]
 
+# Track sides (0 = unknown or within hysteresis)
+COUNTER_SIDE = 1
+BAR_SIDE = -1
+
+
+@dataclass(slots=True)
+class TrackState:
+    """Per-track crossing state."""
+
+    last_centroid: Tuple[float, float] | None = None
+    side: int = 0  # COUNTER_SIDE, BAR_SIDE, or 0 if unknown / within hysteresis
+    visible_frames: int = 0
+    crossed: bool = False  # Whether already counted for this crossing
+
 
 class LineCounter:
     """Direction-aware line crossing counter with hysteresis."""
 
     def __init__(self, config):
         self.config = config
-        self.line_start = tuple(config.counting.line.start)
-        self.line_end = tuple(config.counting.line.end)
         self.direction = config.counting.direction
         self.hysteresis_px = config.counting.hysteresis_px
         self.min_visible_frames = config.counting.min_visible_frames
+        # Maps the cross-product sign to a side; it is also the side "in" ends on
+        self._dir_sign = COUNTER_SIDE if self.direction == "bar_to_counter" else BAR_SIDE
 
         # Track state per track_id
-        self.track_states: Dict[int, Dict] = defaultdict(
-            lambda: {
-                "last_centroid": None,
-                "side": None,  # "bar" or "counter"
-                "visible_frames": 0,
-                "crossed": False,  # Whether already counted for this crossing
-            }
-        )
+        self.track_states: Dict[int, TrackState] = {}
+
+        self._line_start = tuple(config.counting.line.start)
+        self._line_end = tuple(config.counting.line.end)
+        self._update_geometry()
 
         self.in_count = 0
         self.out_count = 0
 
-    def _determine_side(self, point: Tuple[float, float]) -> str | None:
+    @property
+    def line_start(self) -> Tuple[float, float]:
+        return self._line_start
+
+    @line_start.setter
+    def line_start(self, point):
+        self._line_start = tuple(point)
+        self._update_geometry()
+
+    @property
+    def line_end(self) -> Tuple[float, float]:
+        return self._line_end
+
+    @line_end.setter
+    def line_end(self, point):
+        self._line_end = tuple(point)
+        self._update_geometry()
+
+    def _update_geometry(self):
+        """Cache per-line constants used for every track on every frame."""
+        x1, y1 = self._line_start
+        x2, y2 = self._line_end
+        self._dx = x2 - x1
+        self._dy = y2 - y1
+        length = math.hypot(self._dx, self._dy)
+        # Cross product magnitudes at hysteresis_px and 2 * hysteresis_px
+        # from the line (the cross product is distance * length)
+        self._hyst_mag = self.hysteresis_px * length
+        self._far_mag = 2 * self._hyst_mag
+
+        # Stored sides refer to the previous line
+        for state in self.track_states.values():
+            if state.last_centroid is not None:
+                state.side = self._determine_side(state.last_centroid)
+
+    def _determine_side(self, point: Tuple[float, float]) -> int:
         """Determine which side of the line a point is on.
 
         Uses cross product to determine side relative to line direction.
-        Returns "bar" or "counter" or None if on line.
+        Returns COUNTER_SIDE, BAR_SIDE, or 0 if within the hysteresis zone.
         """
         px, py = point
-        x1, y1 = self.line_start
-        x2, y2 = self.line_end
-
-        # Vector from line_start to point
-        v1x = px - x1
-        v1y = py - y1
-
-        # Vector from line_start to line_end
-        v2x = x2 - x1
-        v2y = y2 - y1
-
-        # Cross product
-        cross = v1x * v2y - v1y * v2x
+        x1, y1 = self._line_start
 
-        if abs(cross) < self.hysteresis_px * ((v2x**2 + v2y**2) ** 0.5):
-            return None  # Within hysteresis zone
+        # Cross product of (line_start -> point) and the line direction
+        cross = (px - x1) * self._dy - (py - y1) * self._dx
 
-        # Determine side based on direction
-        if self.direction == "bar_to_counter":
-            # Positive cross = counter side, negative = bar side
-            return "counter" if cross > 0 else "bar"
-        else:  # counter_to_bar
-            # Inverted
-            return "bar" if cross > 0 else "counter"
+        if abs(cross) < self._hyst_mag:
+            return 0
+        return self._dir_sign if cross > 0 else -self._dir_sign
 
-    def _check_crossing(
-        self, track_id: int, prev_centroid: Tuple[float, float], curr_centroid: Tuple[float, float]
-    ) -> str | None:
-        """Check if track crossed the line.
+    def _crosses_segment(self, p: Tuple[float, float], q: Tuple[float, float]) -> bool:
+        """Whether the move p -> q passes between the line's endpoints.
 
-        Returns "in" or "out" if crossing detected, None otherwise.
+        Only called once p and q are known to lie on opposite sides of the
+        line, so it reduces to the line's endpoints straddling the move
+        (what segment_intersect checks, without solving for the point).
         """
-        # Check if line segment intersects with movement segment
-        intersection = segment_intersect(
-            prev_centroid, curr_centroid, self.line_start, self.line_end
-        )
-
-        if intersection is None:
-            return None
-
-        # Determine direction of crossing
-        prev_side = self._determine_side(prev_centroid)
-        curr_side = self._determine_side(curr_centroid)
-
-        # If both on same side or one is None (in hysteresis), no crossing
-        if prev_side is None or curr_side is None or prev_side == curr_side:
-            return None
-
-        # Crossing detected
-        if self.direction == "bar_to_counter":
-            if prev_side == "bar" and curr_side == "counter":
-                return "in"
-            elif prev_side == "counter" and curr_side == "bar":
-                return "out"
-        else:  # counter_to_bar
-            if prev_side == "counter" and curr_side == "bar":
-                return "in"
-            elif prev_side == "bar" and curr_side == "counter":
-                return "out"
-
-        return None
-
-    def update(self, tracked_dets: List[TrackedDetection], timestamp_utc) -> List[Event]:
+        px, py = p
+        mx, my = q[0] - px, q[1] - py
+        x1, y1 = self._line_start
+        # Cross products of the move with (p -> line_start) and (p -> line_end)
+        d1 = mx * (y1 - py) - my * (x1 - px)
+        d2 = d1 + mx * self._dy - my * self._dx
+        return d1 * d2 <= 0
+
+    def _frame_geometry(self, tracked_dets: List[TrackedDetection]) -> Tuple[list, list, list]:
+        """Centroids, sides (as _determine_side) and far-from-line flags for all detections."""
+        x1, y1 = self._line_start
+        dx, dy = self._dx, self._dy
+        hyst_mag, far_mag = self._hyst_mag, self._far_mag
+        pos, neg = self._dir_sign, -self._dir_sign
+
+        cents, sides, far = [], [], []
+        for det in tracked_dets:
+            px = (det[0] + det[2]) / 2
+            py = (det[1] + det[3]) / 2
+            cross = (px - x1) * dy - (py - y1) * dx
+            mag = abs(cross)
+            cents.append((px, py))
+            sides.append(0 if mag < hyst_mag else (pos if cross > 0 else neg))
+            far.append(mag > far_mag)
+        return cents, sides, far
+
+    def update(self, tracked_dets: List[TrackedDetection], timestamp_utc=None) -> List[Event]:
         """Update counter with new tracked detections.
 
+        Centroids, sides and distances to the line are computed for all
+        tracks in one pass; the segment test only runs for tracks whose side
+        changed since the previous frame.
+
         Args:
             tracked_dets: List of TrackedDetection
-            timestamp_utc: UTC datetime for events
+            timestamp_utc: UTC datetime for events, or None to read the wall
+                clock only when an event fires
 
         Returns:
             List of Event dicts for new crossings
         """
         events = []
 
-        # Get current centroids for all tracks
+        # Current centroid, side and distance-to-line check per detection
         current_tracks = {}
-        for det in tracked_dets:
-            x1, y1, x2, y2, conf, cls_id, track_id = det
-            cent = centroid((x1, y1, x2, y2))
-            current_tracks[track_id] = {
-                "centroid": cent,
-                "bbox": (x1, y1, x2, y2),
-                "conf": conf,
-            }
-            self.track_states[track_id]["visible_frames"] += 1
-
-        # Check for crossings
-        for track_id, state in list(self.track_states.items()):
+        for det, cent, side, is_far in zip(tracked_dets, *self._frame_geometry(tracked_dets)):
+            track_id = det[6]
+            current_tracks[track_id] = (det, cent, side, is_far)
+            state = self.track_states.get(track_id)
+            if state is None:
+                state = self.track_states[track_id] = TrackState()
+            state.visible_frames += 1
+
+        # Check for crossings; lost tracks are collected and dropped after
+        lost = []
+        for track_id, state in self.track_states.items():
             if track_id not in current_tracks:
-                # Track lost - reset state but keep for a bit
-                state["visible_frames"] = 0
+                lost.append(track_id)
                 continue
 
-            track_info = current_tracks[track_id]
-            curr_cent = track_info["centroid"]
-
-            if state["last_centroid"] is not None:
-                # Check for crossing
-                crossing_dir = self._check_crossing(
-                    track_id, state["last_centroid"], curr_cent
+            det, curr_cent, curr_side, is_far = current_tracks[track_id]
+            prev_side = state.side
+
+            # A crossing needs a side change outside the hysteresis zone
+            if (
+                prev_side
+                and curr_side
+                and prev_side != curr_side
+                and not state.crossed
+                and state.visible_frames >= self.min_visible_frames
+                and self._crosses_segment(state.last_centroid, curr_cent)
+            ):
+                # Sides are +-1 here, so the side reached gives the direction
+                crossing_dir = "in" if curr_side == self._dir_sign else "out"
+                if timestamp_utc is None:
+                    timestamp_utc = now_utc()
+
+                # Create event
+                events.append(
+                    {
+                        "ts_utc": timestamp_utc.isoformat(),
+                        "direction": crossing_dir,
+                        "track_id": track_id,
+                        "bbox": [det[0], det[1], det[2], det[3]],
+                        "conf": float(det[4]),
+                    }
                 )
 
-                if crossing_dir and not state["crossed"]:
-                    # Only count if track has been visible enough
-                    if state["visible_frames"] >= self.min_visible_frames:
-                        # Create event
-                        event = {
-                            "ts_utc": timestamp_utc.isoformat(),
-                            "direction": crossing_dir,
-                            "track_id": track_id,
-                            "bbox": list(track_info["bbox"]),
-                            "conf": float(track_info["conf"]),
-                        }
-                        events.append(event)
-
-                        # Update counts
-                        if crossing_dir == "in":
-                            self.in_count += 1
-                        else:
-                            self.out_count += 1
-
-                        # Mark as crossed to prevent double-counting
-                        state["crossed"] = True
+                # Update counts
+                if crossing_dir == "in":
+                    self.in_count += 1
+                else:
+                    self.out_count += 1
+
+                # Mark as crossed to prevent double-counting
+                state.crossed = True
 
             # Update state
-            state["last_centroid"] = curr_cent
-            state["side"] = self._determine_side(curr_cent)
+            state.last_centroid = curr_cent
+            state.side = curr_side
 
             # Reset crossed flag if track moved away from line
-            if state["side"] is not None:
-                dist_to_line = abs(
-                    (self.line_end[1] - self.line_start[1]) * curr_cent[0]
-                    - (self.line_end[0] - self.line_start[0]) * curr_cent[1]
-                    + self.line_end[0] * self.line_start[1]
-                    - self.line_end[1] * self.line_start[0]
-                ) / ((self.line_end[1] - self.line_start[1]) ** 2 + (self.line_end[0] - self.line_start[0]) ** 2) ** 0.5
-
-                if dist_to_line > self.hysteresis_px * 2:
-                    state["crossed"] = False
-
-        # Clean up old tracks
-        for track_id in list(self.track_states.keys()):
-            if track_id not in current_tracks:
-                if self.track_states[track_id]["visible_frames"] == 0:
-                    # Remove after a delay
-                    del self.track_states[track_id]
+            if curr_side and is_far:
+                state.crossed = False
+
+        for track_id in lost:
+            del self.track_states[track_id]
 
         return events
 
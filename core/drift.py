@@ -1,15 +1,54 @@
 """Drift monitoring: SSIM, edge IoU, brightness variance."""
 
+import functools
 import logging
 from collections import deque
 from typing import Tuple
 
-import cv2
 import numpy as np
-from skimage.metrics import structural_similarity as ssim
 
 logger = logging.getLogger(__name__)
 
+# SSIM parameters (match skimage.metrics.structural_similarity defaults)
+SSIM_WIN_SIZE = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# Rolling metric windows (samples): averages, and recent-trend flags
+HISTORY_SIZE = 30
+RECENT_SIZE = 10
+
+
+@functools.cache
+def _cv2():
+    """Import OpenCV on first use (a disabled monitor never needs it)."""
+    import cv2
+
+    return cv2
+
+
+class RollingMean:
+    """Mean of the last maxlen values, kept as a running sum (O(1) per call)."""
+
+    __slots__ = ("values", "total")
+
+    def __init__(self, maxlen: int):
+        self.values = deque(maxlen=maxlen)
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value: float):
+        values = self.values
+        if len(values) == values.maxlen:
+            self.total -= values[0]
+        values.append(value)
+        self.total += value
+
+    def mean(self, default: float) -> float:
+        return self.total / len(self.values) if self.values else default
+
 
 class DriftMonitor:
     """Monitor scene drift: camera shift, lighting changes."""
@@ -17,19 +56,30 @@ class DriftMonitor:
     def __init__(self, config):
         self.config = config
         self.enabled = config.drift.enabled
+        self.downsample_wh = tuple(config.drift.downsample_wh)
+
+        # Thresholds read once; update() runs without touching the config models
+        self.ssim_threshold = config.drift.ssim_threshold
+        self.edge_iou_threshold = config.drift.edge_iou_threshold
+        self.brightness_var_min = config.drift.brightness_var_min
+        self.re_calibrate_on_drift = config.drift.re_calibrate_on_drift
+        self.min_minutes_between_recal = config.drift.min_minutes_between_recal
 
         if not self.enabled:
             return
 
         # Reference frame (set on first frame or after calibration)
         self.reference_frame = None
+        self.reference_gray = None
         self.reference_edges = None
         self.reference_brightness = None
 
         # Rolling metrics
-        self.ssim_history = deque(maxlen=30)  # Last 30 frames
-        self.edge_iou_history = deque(maxlen=30)
-        self.brightness_history = deque(maxlen=30)
+        self.ssim_history = RollingMean(HISTORY_SIZE)
+        self.edge_iou_history = RollingMean(HISTORY_SIZE)
+        self.brightness_history = RollingMean(HISTORY_SIZE)
+        self.ssim_recent = RollingMean(RECENT_SIZE)
+        self.brightness_recent = RollingMean(RECENT_SIZE)
 
         # State
         self.last_recal_time = None
@@ -41,25 +91,115 @@ class DriftMonitor:
             return
 
         self.reference_frame = frame.copy()
-        self.reference_edges = self._compute_edges(frame)
-        self.reference_brightness = self._compute_brightness(frame)
+        self.reference_gray = self._prepare(frame)
+        self.reference_edges = self._compute_edges(self.reference_gray)
+        self.reference_brightness = self._compute_brightness(self.reference_gray)
+        self._set_ssim_reference(self.reference_gray)
+
+        # Per-update outputs, reused frame to frame
+        w, h = self.downsample_wh
+        self._small_buf = np.empty((h, w, 3), dtype=np.uint8)
+        self._gray_buf = np.empty((h, w), dtype=np.uint8)
+        self._edges_buf = np.empty((h, w), dtype=np.uint8)
+        self._mask_buf = np.empty((h, w), dtype=np.uint8)
         logger.info("Drift monitor reference frame set")
 
-    def _compute_edges(self, frame: np.ndarray) -> np.ndarray:
-        """Compute Canny edges."""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
+    def _prepare(
+        self, frame: np.ndarray, small: np.ndarray | None = None, gray: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Downsample to downsample_wh and convert to grayscale.
+
+        Camera shift and lighting show up just as well at low resolution,
+        and SSIM/Canny cost scales with pixel count. small and gray are
+        optional output buffers for the resized and grayscale images.
+        """
+        cv2 = _cv2()
+        if (frame.shape[1], frame.shape[0]) != self.downsample_wh:
+            frame = cv2.resize(frame, self.downsample_wh, dst=small, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+
+    def _set_ssim_reference(self, gray: np.ndarray):
+        """Precompute the reference's local statistics and per-frame scratch buffers."""
+        ref = gray.astype(np.float32)
+        self._ssim_mu_ref = self._box(ref)
+        self._ssim_var_ref = self._box(ref * ref) - self._ssim_mu_ref**2
+        self._ssim_mu_ref_sq = self._ssim_mu_ref**2
+        self._ssim_ref = ref
+        self._ssim_buf = {
+            name: np.empty_like(ref) for name in ("cur", "mu", "var", "cov", "tmp", "num")
+        }
+
+    @staticmethod
+    def _box(src: np.ndarray, dst: np.ndarray | None = None) -> np.ndarray:
+        """Local mean over the SSIM window (reflected borders, like scipy's uniform_filter)."""
+        cv2 = _cv2()
+        return cv2.blur(
+            src, (SSIM_WIN_SIZE, SSIM_WIN_SIZE), dst=dst, borderType=cv2.BORDER_REFLECT
+        )
+
+    def _ssim(self, gray: np.ndarray) -> float:
+        """Mean SSIM of a grayscale frame against the reference.
+
+        Same math as skimage's default structural_similarity (7x7 uniform
+        window, sample covariance, border cropped from the mean) built on
+        OpenCV box filters. The reference's mean and variance are cached, so
+        only three filters run per frame, all into preallocated float32 buffers.
+        """
+        buf = self._ssim_buf
+        cur, mu, var, cov, tmp, num = (buf[k] for k in ("cur", "mu", "var", "cov", "tmp", "num"))
+        mu_ref, var_ref = self._ssim_mu_ref, self._ssim_var_ref
+        # Unbiased (N-1) local variances, as in skimage
+        cov_norm = SSIM_WIN_SIZE**2 / (SSIM_WIN_SIZE**2 - 1)
+
+        np.copyto(cur, gray, casting="unsafe")
+        self._box(cur, mu)
+        np.multiply(cur, cur, out=tmp)
+        self._box(tmp, var)
+        np.multiply(cur, self._ssim_ref, out=tmp)
+        self._box(tmp, cov)
+
+        # var = cov_norm * (E[y^2] - mu^2), cov = cov_norm * (E[xy] - mu_ref * mu)
+        np.multiply(mu, mu, out=tmp)
+        np.subtract(var, tmp, out=var)
+        np.multiply(mu_ref, mu, out=tmp)
+        np.subtract(cov, tmp, out=cov)
+
+        # num = (2 * mu_ref * mu + C1) * (2 * cov_norm * cov + C2)
+        np.multiply(tmp, 2.0, out=num)
+        num += SSIM_C1
+        np.multiply(cov, 2.0 * cov_norm, out=cov)
+        cov += SSIM_C2
+        num *= cov
+
+        # den = (mu_ref^2 + mu^2 + C1) * (cov_norm * (var_ref + var) + C2)
+        np.multiply(mu, mu, out=tmp)
+        tmp += self._ssim_mu_ref_sq
+        tmp += SSIM_C1
+        np.add(var, var_ref, out=var)
+        var *= cov_norm
+        var += SSIM_C2
+        tmp *= var
+
+        num /= tmp
+        pad = (SSIM_WIN_SIZE - 1) // 2
+        return float(num[pad:-pad, pad:-pad].mean(dtype=np.float64))
+
+    def _compute_edges(self, gray: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Compute Canny edges of a grayscale frame."""
+        edges = _cv2().Canny(gray, 50, 150, edges=out)
         return edges
 
-    def _compute_brightness(self, frame: np.ndarray) -> float:
-        """Compute brightness variance."""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        return float(np.var(gray))
+    def _compute_brightness(self, gray: np.ndarray) -> float:
+        """Compute brightness variance of a grayscale frame (single pass)."""
+        _, stddev = _cv2().meanStdDev(gray)
+        return float(stddev[0, 0] ** 2)
 
     def _compute_edge_iou(self, edges1: np.ndarray, edges2: np.ndarray) -> float:
-        """Compute IoU between two edge maps."""
-        intersection = np.logical_and(edges1 > 0, edges2 > 0).sum()
-        union = np.logical_or(edges1 > 0, edges2 > 0).sum()
+        """Compute IoU between two uint8 edge maps (Canny output is 0 or 255)."""
+        cv2 = _cv2()
+        mask = self._mask_buf
+        intersection = cv2.countNonZero(cv2.bitwise_and(edges1, edges2, dst=mask))
+        union = cv2.countNonZero(cv2.bitwise_or(edges1, edges2, dst=mask))
         return intersection / union if union > 0 else 0.0
 
     def update(self, frame: np.ndarray) -> dict:
@@ -77,28 +217,31 @@ class DriftMonitor:
                 "drift_score": 0.0,
             }
 
+        # Small grayscale once; every metric below works on it
+        gray_curr = self._prepare(frame, self._small_buf, self._gray_buf)
+
         # Compute SSIM
-        gray_ref = cv2.cvtColor(self.reference_frame, cv2.COLOR_BGR2GRAY)
-        gray_curr = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        ssim_val = ssim(gray_ref, gray_curr, data_range=255)
+        ssim_val = self._ssim(gray_curr)
         self.ssim_history.append(ssim_val)
+        self.ssim_recent.append(ssim_val)
 
         # Compute edge IoU
-        curr_edges = self._compute_edges(frame)
+        curr_edges = self._compute_edges(gray_curr, self._edges_buf)
         edge_iou = self._compute_edge_iou(self.reference_edges, curr_edges)
         self.edge_iou_history.append(edge_iou)
 
         # Compute brightness
-        brightness_var = self._compute_brightness(frame)
+        brightness_var = self._compute_brightness(gray_curr)
         brightness_diff = abs(brightness_var - self.reference_brightness)
         self.brightness_history.append(brightness_var)
+        self.brightness_recent.append(brightness_var)
 
         # Check thresholds
         camera_shifted = (
-            ssim_val < self.config.drift.ssim_threshold
-            or edge_iou < self.config.drift.edge_iou_threshold
+            ssim_val < self.ssim_threshold
+            or edge_iou < self.edge_iou_threshold
         )
-        lighting_bad = brightness_var < self.config.drift.brightness_var_min
+        lighting_bad = brightness_var < self.brightness_var_min
 
         # Drift score (0-1, higher = more drift)
         drift_score = (
@@ -113,14 +256,14 @@ class DriftMonitor:
             "ssim": float(ssim_val),
             "edge_iou": float(edge_iou),
             "brightness_var": float(brightness_var),
-            "camera_shifted": camera_shifted,
-            "lighting_bad": lighting_bad,
+            "camera_shifted": bool(camera_shifted),
+            "lighting_bad": bool(lighting_bad),
             "drift_score": float(drift_score),
         }
 
     def should_recalibrate(self) -> bool:
         """Check if recalibration should be triggered."""
-        if not self.enabled or not self.config.drift.re_calibrate_on_drift:
+        if not self.enabled or not self.re_calibrate_on_drift:
             return False
 
         if not self.drift_detected:
@@ -131,7 +274,7 @@ class DriftMonitor:
             import time
 
             minutes_since = (time.time() - self.last_recal_time) / 60.0
-            if minutes_since < self.config.drift.min_minutes_between_recal:
+            if minutes_since < self.min_minutes_between_recal:
                 return False
 
         return True
@@ -149,14 +292,10 @@ class DriftMonitor:
         if not self.enabled:
             return {}
 
-        avg_ssim = np.mean(self.ssim_history) if self.ssim_history else 1.0
-        avg_edge_iou = np.mean(self.edge_iou_history) if self.edge_iou_history else 1.0
-        avg_brightness = np.mean(self.brightness_history) if self.brightness_history else 0.0
-
         return {
-            "ssim_avg": float(avg_ssim),
-            "edge_iou_avg": float(avg_edge_iou),
-            "brightness_avg": float(avg_brightness),
+            "ssim_avg": self.ssim_history.mean(1.0),
+            "edge_iou_avg": self.edge_iou_history.mean(1.0),
+            "brightness_avg": self.brightness_history.mean(0.0),
             "camera_shifted": self.camera_shifted(),
             "lighting_bad": self.lighting_bad(),
             "last_recal_time": self.last_recal_time,
@@ -164,17 +303,15 @@ class DriftMonitor:
 
     def camera_shifted(self) -> bool:
         """Check if camera appears shifted."""
-        if not self.enabled or not self.ssim_history:
+        if not self.enabled or not self.ssim_recent:
             return False
 
-        recent_ssim = list(self.ssim_history)[-10:]  # Last 10 frames
-        return np.mean(recent_ssim) < self.config.drift.ssim_threshold
+        return self.ssim_recent.mean(1.0) < self.ssim_threshold
 
     def lighting_bad(self) -> bool:
         """Check if lighting is problematic."""
-        if not self.enabled or not self.brightness_history:
+        if not self.enabled or not self.brightness_recent:
             return False
 
-        recent_brightness = list(self.brightness_history)[-10:]
-        return np.mean(recent_brightness) < self.config.drift.brightness_var_min
+        return self.brightness_recent.mean(0.0) < self.brightness_var_min
 
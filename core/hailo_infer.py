@@ -3,6 +3,7 @@
 import logging
 import random
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
@@ -14,6 +15,9 @@ logger = logging.getLogger(__name__)
 # Detection format: (x1, y1, x2, y2, conf, cls_id)
 Detection = Tuple[float, float, float, float, float, int]
 
+# Cells per side of the grayscale grid used to detect unchanged frames
+STATIC_GRID_SIZE = 32
+
 
 class HailoInfer:
     """Hailo inference engine with mock mode."""
@@ -24,14 +28,31 @@ class HailoInfer:
         self.hef_path = Path(config.model.hef_path)
         self.device = None
         self.network_group = None
+        self.network_group_params = None
         self.input_vstreams = None
         self.output_vstreams = None
         self.model_height = 640  # Default YOLO input size
         self.model_width = 640
 
-        # Mock mode state
+        # Letterbox geometry and canvas, reused while the input size holds;
+        # the padding is only repainted when it changes
+        self._letterbox_key = None
+
+        # Input tensor layout (Hailo vstreams are channels-last unless the
+        # HEF says otherwise)
+        self._input_nchw = False
+
+        # Mock mode state (own generator, so mock runs don't touch the global one)
         self._mock_tracks = []
         self._mock_frame_count = 0
+        self._mock_rng = random.Random()
+
+        # Single device thread: requests run in submission order while the
+        # caller preprocesses the next frame and consumes earlier results
+        self._device_pool = None
+
+        # Auxiliary HEFs configured on the same device, by path
+        self._aux_networks = {}
 
         if not self.mock_mode:
             self._init_hailo()
@@ -41,7 +62,7 @@ class HailoInfer:
     def _init_hailo(self):
         """Initialize Hailo device and load model."""
         try:
-            from hailo_platform import Device, HEF
+            from hailo_platform import HEF, Device, FormatOrder
 
             if not self.hef_path.exists():
                 raise FileNotFoundError(f"HEF model not found: {self.hef_path}")
@@ -58,10 +79,15 @@ class HailoInfer:
             # Get input/output vstreams
             self.input_vstreams = network_group.get_input_vstreams()
             self.output_vstreams = network_group.get_output_vstreams()
+            input_order = hef.get_input_vstream_infos()[0].format.order
+            self._input_nchw = input_order == FormatOrder.NCHW
+            logger.info(f"Model input layout: {input_order}")
 
             # Activate network group
             network_group.activate(network_group_params)
             self.network_group = network_group
+            self.network_group_params = network_group_params
+            self._device_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hailo")
 
             # Try to infer model input size from HEF metadata
             # This is a placeholder - actual implementation depends on Hailo API
@@ -76,47 +102,69 @@ class HailoInfer:
             logger.error(f"Failed to initialize Hailo: {e}")
             raise
 
-    def _preprocess(self, frame: np.ndarray) -> Tuple[np.ndarray, float, float]:
-        """Preprocess frame: letterbox resize to model input size.
+    def _new_input(self, batch_size: int) -> np.ndarray:
+        """Allocate an input tensor for a batch, in the model's layout."""
+        h, w = self.model_height, self.model_width
+        shape = (batch_size, 3, h, w) if self._input_nchw else (batch_size, h, w, 3)
+        return np.empty(shape, dtype=np.float32)
 
-        Returns (preprocessed_frame, scale_x, scale_y) for coordinate mapping.
-        """
-        h, w = frame.shape[:2]
-        target_h, target_w = self.model_height, self.model_width
-
-        # Calculate scaling to fit while maintaining aspect ratio
-        scale = min(target_w / w, target_h / h)
-        new_w = int(w * scale)
-        new_h = int(h * scale)
+    def _preprocess(
+        self, frame: np.ndarray, out: np.ndarray | None = None
+    ) -> Tuple[np.ndarray, float, float, int, int]:
+        """Preprocess frame: letterbox resize to model input size.
 
-        # Resize
-        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        The normalized image is written into out, one frame's slot of an
+        input tensor from _new_input(), so batches reach the device without
+        another copy.
 
-        # Create letterbox (pad to target size)
-        top = (target_h - new_h) // 2
-        bottom = target_h - new_h - top
-        left = (target_w - new_w) // 2
-        right = target_w - new_w - left
+        Returns (preprocessed_frame, scale_x, scale_y, offset_x, offset_y)
+        for coordinate mapping.
+        """
+        if out is None:
+            out = self._new_input(1)[0]
 
-        letterboxed = cv2.copyMakeBorder(
-            resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        h, w = frame.shape[:2]
+        key = (h, w, self.model_height, self.model_width)
+        if key != self._letterbox_key:
+            self._set_letterbox(key)
+        new_w, new_h = self._letterbox_size
+
+        # Resize straight into the canvas
+        cv2.resize(
+            frame, (new_w, new_h), dst=self._letterbox_view, interpolation=cv2.INTER_LINEAR
         )
 
         # Convert BGR to RGB if needed (depends on model)
         # For now, assume model expects RGB
-        letterboxed_rgb = cv2.cvtColor(letterboxed, cv2.COLOR_BGR2RGB)
+        cv2.cvtColor(self._letterbox, cv2.COLOR_BGR2RGB, dst=self._letterbox_rgb)
 
         # Normalize to [0, 1] or model-specific range
         # Placeholder - adjust based on model requirements
-        normalized = letterboxed_rgb.astype(np.float32) / 255.0
+        rgb = self._letterbox_rgb.transpose(2, 0, 1) if self._input_nchw else self._letterbox_rgb
+        np.multiply(rgb, np.float32(1 / 255.0), out=out, dtype=np.float32)
+
+        return (out, *self._letterbox_mapping)
 
-        # Calculate scale factors for coordinate mapping
-        scale_x = w / new_w
-        scale_y = h / new_h
-        offset_x = -left
-        offset_y = -top
+    def _set_letterbox(self, key: Tuple[int, int, int, int]):
+        """Compute letterbox geometry and canvas for an input/model size pair."""
+        h, w, target_h, target_w = key
 
-        return normalized, scale_x, scale_y, offset_x, offset_y
+        # Calculate scaling to fit while maintaining aspect ratio
+        scale = min(target_w / w, target_h / h)
+        new_w = int(w * scale)
+        new_h = int(h * scale)
+
+        # Letterbox placement (pad to target size)
+        top = (target_h - new_h) // 2
+        left = (target_w - new_w) // 2
+
+        self._letterbox = np.full((target_h, target_w, 3), 114, dtype=np.uint8)
+        self._letterbox_rgb = np.empty_like(self._letterbox)
+        self._letterbox_view = self._letterbox[top : top + new_h, left : left + new_w]
+        self._letterbox_size = (new_w, new_h)
+        # (scale_x, scale_y, offset_x, offset_y) for coordinate mapping
+        self._letterbox_mapping = (w / new_w, h / new_h, -left, -top)
+        self._letterbox_key = key
 
     def _generate_mock_detections(self, frame: np.ndarray) -> List[Detection]:
         """Generate synthetic cup detections for mock mode."""
@@ -124,14 +172,16 @@ class HailoInfer:
         h, w = frame.shape[:2]
 
         detections = []
+        rand = self._mock_rng.random
+        uniform = self._mock_rng.uniform
 
         # Create 1-3 synthetic cups that move across frame
-        if len(self._mock_tracks) == 0 or random.random() < 0.02:
+        if len(self._mock_tracks) == 0 or rand() < 0.02:
             # Spawn new cup
-            x = random.randint(50, w - 50)
-            y = random.randint(100, h - 100)
-            vx = random.uniform(2, 5)  # pixels per frame
-            vy = random.uniform(-1, 1)
+            x = self._mock_rng.randint(50, w - 50)
+            y = self._mock_rng.randint(100, h - 100)
+            vx = uniform(2, 5)  # pixels per frame
+            vy = uniform(-1, 1)
             self._mock_tracks.append({"x": x, "y": y, "vx": vx, "vy": vy, "age": 0})
 
         # Update existing tracks
@@ -146,13 +196,13 @@ class HailoInfer:
                 continue
 
             # Generate detection
-            box_size = random.randint(40, 80)
+            box_size = 40 + int(rand() * 41)  # 40-80, cheaper than randint
             x1 = max(0, int(track["x"] - box_size / 2))
             y1 = max(0, int(track["y"] - box_size / 2))
             x2 = min(w, int(track["x"] + box_size / 2))
             y2 = min(h, int(track["y"] + box_size / 2))
 
-            conf = random.uniform(0.5, 0.95)
+            conf = uniform(0.5, 0.95)
             cls_id = 41  # Placeholder class ID for "cup"
 
             detections.append((float(x1), float(y1), float(x2), float(y2), conf, cls_id))
@@ -164,18 +214,72 @@ class HailoInfer:
 
         Returns list of (x1, y1, x2, y2, conf, cls_id) in image coordinates.
         """
+        return self.infer_end(self.infer_begin(frame))
+
+    def infer_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        """Run inference on a batch of frames in a single device call.
+
+        Returns one detection list per input frame, in order.
+        """
+        return self.infer_end(self.infer_batch_begin(frames))
+
+    def infer_begin(self, frame: np.ndarray) -> Future:
+        """Submit one frame without waiting for its result.
+
+        Returns a token for infer_end(), which yields the frame's detections.
+        Keeping two requests in flight lets the device start frame N+1
+        while frame N is still being read back and post-processed.
+        """
         if self.mock_mode:
-            return self._generate_mock_detections(frame)
+            return self._completed(self._generate_mock_detections(frame))
 
         try:
-            # Preprocess
-            preprocessed, scale_x, scale_y, offset_x, offset_y = self._preprocess(frame)
+            # A fresh tensor per request: earlier ones may still be in flight
+            input_data = self._new_input(1)
+            preprocessed = [self._preprocess(frame, input_data[0])]
+        except Exception as e:
+            logger.error(f"Hailo preprocess error: {e}")
+            return self._completed([])
+        return self._device_pool.submit(lambda: self._run_device(input_data, preprocessed)[0])
 
-            # Prepare input tensor
-            # Shape depends on model - typically (1, 3, H, W) or (1, H, W, 3)
-            input_data = np.expand_dims(preprocessed, axis=0)
-            input_data = np.transpose(input_data, (0, 3, 1, 2))  # NHWC -> NCHW
+    def infer_batch_begin(self, frames: List[np.ndarray]) -> Future:
+        """Submit a batch of frames; infer_end() yields one list per frame."""
+        if self.mock_mode:
+            return self._completed([self._generate_mock_detections(frame) for frame in frames])
+
+        if not frames:
+            return self._completed([])
 
+        try:
+            input_data = self._new_input(len(frames))
+            preprocessed = [
+                self._preprocess(frame, slot) for frame, slot in zip(frames, input_data)
+            ]
+        except Exception as e:
+            logger.error(f"Hailo preprocess error: {e}")
+            return self._completed([[] for _ in frames])
+        return self._device_pool.submit(self._run_device, input_data, preprocessed)
+
+    def infer_end(self, token: Future):
+        """Wait for a request from infer_begin()/infer_batch_begin()."""
+        return token.result()
+
+    @staticmethod
+    def _completed(result) -> Future:
+        """Wrap an already computed result as a token."""
+        token = Future()
+        token.set_result(result)
+        return token
+
+    def _run_device(
+        self, input_data: np.ndarray, preprocessed: List[Tuple]
+    ) -> List[List[Detection]]:
+        """Run a filled input tensor through the device (device thread only).
+
+        preprocessed holds each frame's _preprocess() result, for mapping
+        boxes back to image coordinates.
+        """
+        try:
             # Run inference
             input_dict = {vstream.name: input_data for vstream in self.input_vstreams}
             output_dict = self.network_group.run(input_dict)
@@ -189,16 +293,62 @@ class HailoInfer:
             # This would typically involve:
             # 1. Decode boxes from model format
             # 2. Apply confidence threshold
-            # 3. Scale boxes back to image coordinates using scale_x, scale_y, offset_x, offset_y
+            # 3. Scale boxes back to image coordinates using each frame's scale/offset
             # 4. Filter by class
 
-            # For now, return empty list (actual implementation needed)
+            # For now, return empty lists (actual implementation needed)
             logger.warning("Hailo inference placeholder - implement model-specific parsing")
-            return []
+            return [[] for _ in preprocessed]
 
         except Exception as e:
             logger.error(f"Hailo inference error: {e}")
-            return []
+            return [[] for _ in preprocessed]
+
+    def load_aux(self, hef_path: Path):
+        """Configure an auxiliary HEF on the already open device.
+
+        Each HEF is configured once per device. Returns a handle for
+        infer_aux().
+        """
+        if self.device is None:
+            raise RuntimeError("Hailo device not initialized")
+
+        key = str(hef_path)
+        if key not in self._aux_networks:
+            from hailo_platform import HEF
+
+            network_group = self.device.configure(HEF(key))
+            self._aux_networks[key] = (
+                network_group,
+                network_group.create_params(),
+                network_group.get_input_vstreams(),
+            )
+            logger.info(f"Auxiliary model loaded: {hef_path}")
+        return self._aux_networks[key]
+
+    def infer_aux(self, aux, input_data: np.ndarray) -> np.ndarray:
+        """Run an input tensor through an auxiliary network from load_aux().
+
+        Runs on the device thread between detection requests, which are
+        paused while the auxiliary network is active. Returns its first
+        output.
+        """
+        return self._device_pool.submit(self._run_aux, aux, input_data).result()
+
+    def _run_aux(self, aux, input_data: np.ndarray) -> np.ndarray:
+        """Swap an auxiliary network in for one run (device thread only)."""
+        network_group, network_group_params, input_vstreams = aux
+        self.network_group.deactivate()
+        try:
+            network_group.activate(network_group_params)
+            try:
+                input_dict = {vstream.name: input_data for vstream in input_vstreams}
+                output_dict = network_group.run(input_dict)
+            finally:
+                network_group.deactivate()
+        finally:
+            self.network_group.activate(self.network_group_params)
+        return list(output_dict.values())[0]
 
     def warmup(self, num_frames: int = 5):
         """Run warmup inferences."""
@@ -218,6 +368,8 @@ class HailoInfer:
             return
 
         try:
+            if self._device_pool:
+                self._device_pool.shutdown(wait=True)
             if self.network_group:
                 self.network_group.deactivate()
             if self.device:
@@ -226,3 +378,120 @@ class HailoInfer:
         except Exception as e:
             logger.error(f"Error closing Hailo: {e}")
 
+
+class InferBatcher:
+    """Micro-batch captured frames into HailoInfer.infer_batch calls.
+
+    A batch is submitted once max_batch frames are collected or the oldest
+    frame has waited max_wait_ms, whichever comes first.
+
+    With static_threshold > 0, frames where no cell of a 32x32 grayscale
+    grid changed its mean level by static_threshold or more since the last
+    inferred frame skip the device and reuse its detections. Taking the max
+    over cells keeps one moving object from being averaged away by the rest
+    of the frame. At most static_refresh frames in a row are skipped, so
+    tracks still see fresh detections.
+    """
+
+    def __init__(
+        self,
+        infer: HailoInfer,
+        max_batch: int = 1,
+        max_wait_ms: float = 20.0,
+        static_threshold: float = 0.0,
+        static_refresh: int = 10,
+    ):
+        self.infer = infer
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        # Synthetic mock detections move on their own, never reuse them
+        self.static_threshold = 0.0 if infer.mock_mode else static_threshold
+        self.static_refresh = static_refresh
+        self.skipped_frames = 0
+        self._last_thumb = None  # Thumbnail of the last inferred frame
+        self._static_run = 0
+        self._last_detections: List[Detection] = []
+
+    def _is_static(self, frame: np.ndarray) -> bool:
+        """Check frame against the last inferred one (updates the reference)."""
+        if self.static_threshold <= 0:
+            return False
+
+        small = cv2.resize(
+            frame, (STATIC_GRID_SIZE, STATIC_GRID_SIZE), interpolation=cv2.INTER_AREA
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        thumb = gray.astype(np.float32)
+        if (
+            self._last_thumb is not None
+            and self._static_run < self.static_refresh
+            and cv2.norm(thumb, self._last_thumb, cv2.NORM_INF) < self.static_threshold
+        ):
+            self._static_run += 1
+            self.skipped_frames += 1
+            return True
+
+        self._last_thumb = thumb
+        self._static_run = 0
+        return False
+
+    def next_batch(self, source, timeout: float = 0.5) -> Tuple[list, bool]:
+        """Collect the newest frames from a capturing FrameSource.
+
+        Returns:
+            (items, ended) - items of (frame, timestamp_ns), possibly empty if
+            nothing arrived in time
+        """
+        item = source.latest(timeout)
+        if item is None:
+            return [], source.capture_ended
+
+        items = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            item = source.latest(remaining)
+            if item is None:
+                break
+            items.append(item)
+        return items, False
+
+    def run(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        """Infer a batch, demuxed to one detection list per frame."""
+        return self.end(self.begin(frames))
+
+    def begin(self, frames: List[np.ndarray]) -> Tuple[List[bool], Future | None]:
+        """Submit a batch without waiting; pass the token to end()."""
+        static = [self._is_static(frame) for frame in frames]
+        pending = [frame for frame, skip in zip(frames, static) if not skip]
+        if not pending:
+            request = None
+        elif len(pending) == 1:
+            request = self.infer.infer_begin(pending[0])
+        else:
+            request = self.infer.infer_batch_begin(pending)
+        return static, request
+
+    def end(self, token: Tuple[List[bool], Future | None]) -> List[List[Detection]]:
+        """Wait for a batch from begin(), one detection list per frame.
+
+        Tokens must be ended in submission order: skipped frames take the
+        detections of the latest inferred frame before them.
+        """
+        static, request = token
+        if request is None:
+            results = []
+        else:
+            result = self.infer.infer_end(request)
+            results = result if static.count(False) > 1 else [result]
+
+        inferred = iter(results)
+        batch_detections = []
+        for skip in static:
+            if not skip:
+                self._last_detections = next(inferred)
+            batch_detections.append(self._last_detections)
+        return batch_detections
+
@@ -0,0 +1,118 @@
+"""Hailo line-proposal head for auto-calibration (replaces Canny + Hough)."""
+
+import logging
+from pathlib import Path
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class HailoLineProposer:
+    """Propose counting-line candidates with a small FCN on the Hailo device.
+
+    The model takes the averaged grayscale warmup frame and outputs a
+    Hough-space score map of shape (n_rho, n_theta), with rho spanning
+    [-diag, diag] and theta spanning [0, pi). Peaks are decoded into line
+    segments clipped to the frame.
+
+    The model is configured on the device already opened by the detection
+    HailoInfer and run through its infer_aux().
+    """
+
+    def __init__(self, config, infer):
+        self.config = config
+        self.infer = infer
+        self.hef_path = Path(config.autocal.line_hef_path)
+        self.aux = None
+        self.model_height = 256
+        self.model_width = 256
+        self.available = False
+
+        if not self.hef_path.exists():
+            logger.info(f"Line proposal model not deployed ({self.hef_path}), using CPU path")
+            return
+
+        try:
+            self.aux = infer.load_aux(self.hef_path)
+            self.available = True
+        except Exception as e:
+            logger.warning(f"Line proposal model unavailable, using CPU path: {e}")
+
+    def propose(self, gray: np.ndarray, top_k: int) -> np.ndarray | None:
+        """Run the model on a grayscale frame.
+
+        Returns (K, 4) int32 array of lines, or None on failure.
+        """
+        if not self.available:
+            return None
+
+        try:
+            resized = cv2.resize(
+                gray, (self.model_width, self.model_height), interpolation=cv2.INTER_AREA
+            )
+            input_data = (resized.astype(np.float32) / 255.0)[None, None]
+            score_map = np.squeeze(self.infer.infer_aux(self.aux, input_data))
+        except Exception as e:
+            logger.error(f"Line proposal inference error: {e}")
+            return None
+
+        h, w = gray.shape[:2]
+        return decode_line_peaks(score_map, (w, h), top_k)
+
+
+
+def decode_line_peaks(
+    score_map: np.ndarray,
+    frame_size: Tuple[int, int],
+    top_k: int,
+    min_score: float = 0.5,
+    nms_size: int = 5,
+) -> np.ndarray:
+    """Decode local maxima of a (rho, theta) score map into line segments.
+
+    Args:
+        score_map: (n_rho, n_theta) scores
+        frame_size: (width, height) of the target image
+        top_k: Max number of lines to return
+        min_score: Minimum peak score
+        nms_size: Max-filter window used for peak suppression
+
+    Returns:
+        (K, 4) int32 array of (x1, y1, x2, y2) inside the frame, sorted by
+        score; lines that miss the frame are dropped
+    """
+    score_map = np.asarray(score_map, dtype=np.float32)
+    n_rho, n_theta = score_map.shape
+    w, h = frame_size
+    diag = float(np.hypot(w, h))
+
+    # Non-maximum suppression via max filter
+    local_max = cv2.dilate(score_map, np.ones((nms_size, nms_size), np.uint8))
+    rho_idx, theta_idx = np.nonzero((score_map >= local_max) & (score_map >= min_score))
+    order = np.argsort(-score_map[rho_idx, theta_idx])[:top_k]
+    rho_idx, theta_idx = rho_idx[order], theta_idx[order]
+
+    rho = (rho_idx + 0.5) / n_rho * 2 * diag - diag
+    theta = (theta_idx + 0.5) / n_theta * np.pi
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+
+    # Lines across the frame width; skip near-vertical ones
+    keep = np.abs(sin_t) > 1e-3
+    rho, sin_t, cos_t = rho[keep], sin_t[keep], cos_t[keep]
+    x2 = w - 1
+    y1 = rho / sin_t
+    y2 = (rho - x2 * cos_t) / sin_t
+
+    lines = np.stack([np.zeros_like(y1), y1, np.full_like(y1, x2), y2], axis=1)
+    lines = np.round(np.clip(lines, -(2**30), 2**30)).astype(np.int64)
+
+    # Steep lines leave through the top/bottom edge: clip to the frame
+    clipped = []
+    for x1, y1, x2, y2 in lines.tolist():
+        inside, p1, p2 = cv2.clipLine((0, 0, w, h), (x1, y1), (x2, y2))
+        if inside:
+            clipped.append((*p1, *p2))
+    return np.array(clipped, dtype=np.int32).reshape(-1, 4)
@@ -2,32 +2,34 @@
 
 import logging
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from wsgiref.simple_server import WSGIRequestHandler, make_server
 
-from prometheus_client import Counter, Gauge, generate_latest
+from prometheus_client import Counter, Gauge, make_wsgi_app
+from prometheus_client.exposition import ThreadingWSGIServer
 
 logger = logging.getLogger(__name__)
 
 
-class MetricsHandler(BaseHTTPRequestHandler):
-    """HTTP handler for Prometheus metrics."""
-
-    def do_GET(self):
-        """Handle GET request."""
-        if self.path == "/metrics":
-            self.send_response(200)
-            self.send_header("Content-Type", "text/plain; version=0.0.4")
-            self.end_headers()
-            self.wfile.write(generate_latest())
-        else:
-            self.send_response(404)
-            self.end_headers()
+class QuietRequestHandler(WSGIRequestHandler):
+    """WSGI request handler without per-scrape access logs."""
 
     def log_message(self, format, *args):
         """Suppress access logs."""
         pass
 
 
+def metrics_only_app(app):
+    """Serve a WSGI app at /metrics only, with 404 for any other path."""
+
+    def serve(environ, start_response):
+        if environ.get("PATH_INFO") == "/metrics":
+            return app(environ, start_response)
+        start_response("404 Not Found", [("Content-Length", "0")])
+        return [b""]
+
+    return serve
+
+
 class Metrics:
     """Prometheus metrics collector."""
 
@@ -62,7 +64,15 @@ class Metrics:
     def _start_server(self):
         """Start metrics HTTP server in background thread."""
         try:
-            self.server = HTTPServer(("", self.port), MetricsHandler)
+            # prometheus_client's exposition app (gzip, name[] filtering) on a
+            # threading WSGI server, kept as an attribute so stop() can shut it down
+            self.server = make_server(
+                "",
+                self.port,
+                metrics_only_app(make_wsgi_app()),
+                ThreadingWSGIServer,
+                handler_class=QuietRequestHandler,
+            )
             self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.server_thread.start()
             logger.info(f"Metrics server started on port {self.port}")
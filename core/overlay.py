@@ -1,5 +1,7 @@
 """Frame overlay drawing for visualization."""
 
+import functools
+
 import cv2
 import numpy as np
 
@@ -9,6 +11,62 @@ from core.utils import centroid
 # TrackedDetection format: (x1, y1, x2, y2, conf, cls_id, track_id)
 TrackedDetection = tuple
 
+# ROI band tint: 20% of (255, 255, 0) over 80% of the frame
+ROI_BAND_KEEP = 0.8
+ROI_BAND_TINT = (51, 51, 0, 0)
+
+# Track ID label font
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_SCALE = 0.5
+
+# OSD text: white lines at (OSD_X, OSD_Y + i * OSD_SPACING)
+OSD_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OSD_SCALE = 0.6
+OSD_THICKNESS = 2
+OSD_X = 20
+OSD_Y = 30
+OSD_SPACING = 25
+
+
+@functools.cache
+def _id_label_size(length: int) -> tuple[int, int]:
+    """Text size of an "ID:<n>" label of the given length.
+
+    Hershey digits share one advance width, so the size only depends on
+    the number of digits.
+    """
+    return cv2.getTextSize("ID:".ljust(length, "0"), LABEL_FONT, LABEL_SCALE, 1)[0]
+
+
+def _put_osd_line(img: np.ndarray, i: int, text: str):
+    cv2.putText(
+        img,
+        text,
+        (OSD_X, OSD_Y + i * OSD_SPACING),
+        OSD_FONT,
+        OSD_SCALE,
+        (255, 255, 255),
+        OSD_THICKNESS,
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _osd_text_raster(texts: tuple[str, ...]) -> np.ndarray:
+    """White-on-black raster of the OSD lines, anchored at the frame origin.
+
+    The OSD text is drawn without anti-aliasing, so applying this with a
+    per-pixel max is identical to calling putText on the frame. Counts only
+    change on crossings, so most frames reuse a cached raster.
+    """
+    width = max(cv2.getTextSize(t, OSD_FONT, OSD_SCALE, OSD_THICKNESS)[0][0] for t in texts)
+    height = OSD_Y + (len(texts) - 1) * OSD_SPACING + 2 * OSD_SPACING
+    raster = np.zeros((height, OSD_X + width + OSD_SPACING, 3), dtype=np.uint8)
+    for i, text in enumerate(texts):
+        if text:
+            _put_osd_line(raster, i, text)
+    raster.flags.writeable = False
+    return raster
+
 
 def annotate(
     frame: np.ndarray,
@@ -18,6 +76,7 @@ def annotate(
     roi_masker=None,
     drift_metrics: dict = None,
     auto_applied: bool = False,
+    dst: np.ndarray | None = None,
 ) -> np.ndarray:
     """Draw overlays on frame: line, boxes, IDs, OSD, ROI band, drift indicators.
 
@@ -29,23 +88,29 @@ def annotate(
         roi_masker: ROIMasker instance (optional)
         drift_metrics: Dict with drift metrics (optional)
         auto_applied: Whether line was auto-applied (optional)
+        dst: Preallocated output buffer, same shape as frame (optional)
 
     Returns:
-        Annotated frame
+        Annotated frame (dst if given, else a new copy)
     """
-    annotated = frame.copy()
+    if dst is None:
+        annotated = frame.copy()
+    else:
+        np.copyto(dst, frame)
+        annotated = dst
 
     # Draw ROI band if enabled
     if roi_masker and roi_masker.enabled and roi_masker.roi_bbox:
         _, y_top, _, y_bottom = roi_masker.roi_bbox
         h, w = frame.shape[:2]
-        # Draw semi-transparent band
-        overlay = annotated.copy()
-        cv2.rectangle(overlay, (0, y_top), (w, y_bottom), (255, 255, 0), -1)
-        cv2.addWeighted(overlay, 0.2, annotated, 0.8, 0, annotated)
-        # Draw band borders
-        cv2.line(annotated, (0, y_top), (w, y_top), (255, 255, 0), 1)
-        cv2.line(annotated, (0, y_bottom), (w, y_bottom), (255, 255, 0), 1)
+        # Draw semi-transparent band (blend only the band rows, in place:
+        # scale, then add the tint's share, with no color image to blend)
+        band = annotated[max(y_top, 0) : y_bottom + 1]
+        if band.size:
+            cv2.convertScaleAbs(band, dst=band, alpha=ROI_BAND_KEEP)
+            cv2.add(band, ROI_BAND_TINT, dst=band)
+        # Draw band borders (one rectangle; its sides fall just outside the frame)
+        cv2.rectangle(annotated, (-1, y_top), (w, y_bottom), (255, 255, 0), 1)
 
     # Draw counting line
     line_start = line_counter.line_start
@@ -85,7 +150,7 @@ def annotate(
 
         # Track ID label
         label = f"ID:{track_id}"
-        label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        label_size = _id_label_size(len(label))
         cv2.rectangle(
             annotated,
             (x1, y1 - label_size[1] - 4),
@@ -97,30 +162,25 @@ def annotate(
             annotated,
             label,
             (x1, y1 - 2),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
+            LABEL_FONT,
+            LABEL_SCALE,
             (255, 255, 255),
             1,
         )
 
     # Draw OSD (On-Screen Display)
     h, w = annotated.shape[:2]
-    osd_y = 30
-    osd_spacing = 25
-
-    # Background for OSD
-    osd_bg = np.zeros((100, 300, 3), dtype=np.uint8)
-    osd_bg[:] = (0, 0, 0)
-    annotated[10:110, 10:310] = cv2.addWeighted(
-        annotated[10:110, 10:310], 0.7, osd_bg, 0.3, 0
-    )
 
-    # OSD text
+    # Background for OSD (darken in place: 70% frame + 30% black)
+    osd = annotated[10:110, 10:310]
+    cv2.convertScaleAbs(osd, dst=osd, alpha=0.7)
+
+    # OSD text; the FPS line changes every frame and is drawn separately
     texts = [
         f"IN:  {stats.get('in', 0)}",
         f"OUT: {stats.get('out', 0)}",
         f"NET: {stats.get('net', 0)}",
-        f"FPS: {stats.get('fps', 0):.1f}",
+        "",
     ]
 
     # Add drift indicators
@@ -142,16 +202,11 @@ def annotate(
             2,
         )
 
-    for i, text in enumerate(texts):
-        cv2.putText(
-            annotated,
-            text,
-            (20, osd_y + i * osd_spacing),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            2,
-        )
+    raster = _osd_text_raster(tuple(texts))
+    rh, rw = min(raster.shape[0], h), min(raster.shape[1], w)
+    region = annotated[:rh, :rw]
+    cv2.max(region, raster[:rh, :rw], dst=region)
+    _put_osd_line(annotated, 3, f"FPS: {stats.get('fps', 0):.1f}")
 
     return annotated
 
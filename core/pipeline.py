@@ -0,0 +1,45 @@
+"""Process-level cache of inference pipeline components."""
+
+import atexit
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cached (infer, postproc) per model configuration
+_pipelines: Dict[str, Tuple] = {}
+
+
+def _cache_key(config) -> str:
+    """Key on the config section that shapes the inference objects."""
+    return config.model.model_dump_json()
+
+
+def get_pipeline(config) -> Tuple:
+    """Get (infer, postproc, tracker) for a config.
+
+    The Hailo model and post-processor are created once per process and
+    reused by later calls with an equivalent config. The tracker holds
+    per-run state, so a fresh one is returned every call.
+    """
+    from core.tracking import create_tracker
+
+    key = _cache_key(config)
+    if key not in _pipelines:
+        # Deferred so CLI startup does not pay for the Hailo/OpenCV imports
+        from core.hailo_infer import HailoInfer
+        from core.postproc import PostProcessor
+
+        _pipelines[key] = (HailoInfer(config), PostProcessor(config))
+        logger.info("Pipeline initialized")
+
+    infer, postproc = _pipelines[key]
+    return infer, postproc, create_tracker(config)
+
+
+@atexit.register
+def close_pipelines():
+    """Release cached Hailo devices (runs at interpreter exit)."""
+    for infer, _ in _pipelines.values():
+        infer.close()
+    _pipelines.clear()
@@ -27,6 +27,15 @@ class PostProcessor:
         # Load label map
         self.label_map = self._load_label_map()
 
+        # Lookup table: class ID -> passes the filter (by the first name
+        # mapped to each ID). IDs outside the table are rejected in process().
+        self._id_to_name = {}
+        for name, id_val in self.label_map.items():
+            self._id_to_name.setdefault(id_val, name)
+        self._class_allowed = np.zeros(max(self._id_to_name, default=0) + 1, dtype=bool)
+        for id_val, name in self._id_to_name.items():
+            self._class_allowed[id_val] = name in self.class_filter
+
     def _load_label_map(self) -> dict:
         """Load class ID to name mapping from labelmap.json."""
         labelmap_path = Path("models/labelmap.json")
@@ -41,10 +50,7 @@ class PostProcessor:
 
     def _get_class_name(self, cls_id: int) -> str | None:
         """Get class name from class ID."""
-        for name, id_val in self.label_map.items():
-            if id_val == cls_id:
-                return name
-        return None
+        return self._id_to_name.get(cls_id)
 
     def process(self, detections: List[Detection]) -> List[Detection]:
         """Apply NMS, class filtering, and confidence thresholding.
@@ -58,29 +64,24 @@ class PostProcessor:
         if not detections:
             return []
 
-        # Filter by confidence and class
-        filtered = []
-        for det in detections:
-            x1, y1, x2, y2, conf, cls_id = det
-            if conf < self.conf_thresh:
-                continue
+        # One (N, 6) array; confidence and class filtering as masks over it
+        arr = np.asarray(detections, dtype=np.float64)
+        ids = arr[:, 5].astype(np.intp)
+        in_table = (ids >= 0) & (ids < len(self._class_allowed))
+        class_ok = in_table & self._class_allowed[np.where(in_table, ids, 0)]
+        keep = (arr[:, 4] >= self.conf_thresh) & class_ok
+        filtered = arr[keep]
 
-            class_name = self._get_class_name(cls_id)
-            if class_name and class_name in self.class_filter:
-                filtered.append(det)
-
-        if not filtered:
+        if len(filtered) == 0:
             return []
 
-        # Prepare for NMS
-        boxes = np.array([[x1, y1, x2, y2] for x1, y1, x2, y2, _, _ in filtered], dtype=np.float32)
-        scores = np.array([conf for _, _, _, _, conf, _ in filtered], dtype=np.float32)
-        class_ids = np.array([cls_id for _, _, _, _, _, cls_id in filtered], dtype=np.int32)
-
-        # Apply NMS
-        indices = cv2.dnn.NMSBoxes(
-            boxes.tolist(),
-            scores.tolist(),
+        # Apply NMS per class (OpenCV takes boxes as x, y, w, h)
+        boxes_xywh = filtered[:, :4].copy()
+        boxes_xywh[:, 2:] -= boxes_xywh[:, :2]
+        indices = cv2.dnn.NMSBoxesBatched(
+            boxes_xywh,
+            filtered[:, 4],
+            filtered[:, 5].astype(np.int32),
             self.conf_thresh,
             self.iou_thresh,
         )
@@ -94,12 +95,8 @@ class PostProcessor:
         else:
             indices = [indices]
 
-        kept = []
-        for idx in indices[: self.max_detections]:
-            x1, y1, x2, y2 = boxes[idx]
-            conf = scores[idx]
-            cls_id = class_ids[idx]
-            kept.append((float(x1), float(y1), float(x2), float(y2), float(conf), int(cls_id)))
-
-        return kept
+        return [
+            (x1, y1, x2, y2, conf, int(cls_id))
+            for x1, y1, x2, y2, conf, cls_id in filtered[indices[: self.max_detections]].tolist()
+        ]
 
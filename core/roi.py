@@ -8,6 +8,12 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Per-frame weight of the clipped-detection fraction in its moving average
+CLIP_RATIO_ALPHA = 0.02
+
+# Skip masking while the averaged clipped fraction is above this
+CLIP_RATIO_MAX = 0.3
+
 
 class ROIMasker:
     """ROI masking around the counting line."""
@@ -22,10 +28,11 @@ class ROIMasker:
         self.line_end = None
         self.mask = None
         self.roi_bbox = None
+        # Masks per frame (h, w) for the current line
+        self._mask_cache = {}
 
         # Skip masking if too many detections would be clipped
-        self.clipped_detection_count = 0
-        self.total_detection_count = 0
+        self.clip_ratio = 0.0  # EWMA of the per-frame clipped fraction
         self.skip_mask_frames = 0
 
     def set_line(self, line_start: Tuple[int, int], line_end: Tuple[int, int]):
@@ -46,6 +53,7 @@ class ROIMasker:
         y_bottom = mid_y + half_height + self.margin
 
         self.roi_bbox = (0, y_top, None, y_bottom)  # x1, y1, x2, y2 (x2 = full width)
+        self._mask_cache.clear()
 
         logger.info(f"ROI mask set: y={y_top}-{y_bottom}")
 
@@ -53,6 +61,7 @@ class ROIMasker:
         """Get ROI mask for frame.
 
         Returns mask (white=keep, black=clip) or None if disabled/skipped.
+        The mask is cached per frame size and shared, so it is read-only.
         """
         if not self.enabled or self.roi_bbox is None:
             return None
@@ -61,9 +70,13 @@ class ROIMasker:
             return None
 
         h, w = frame_shape[:2]
-        mask = np.zeros((h, w), dtype=np.uint8)
-        _, y_top, _, y_bottom = self.roi_bbox
-        mask[y_top:y_bottom, :] = 255
+        mask = self._mask_cache.get((h, w))
+        if mask is None:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            _, y_top, _, y_bottom = self.roi_bbox
+            mask[y_top:y_bottom, :] = 255
+            mask.flags.writeable = False
+            self._mask_cache[(h, w)] = mask
         return mask
 
     def apply_mask(self, frame: np.ndarray) -> np.ndarray:
@@ -71,12 +84,13 @@ class ROIMasker:
         if not self.enabled:
             return frame
 
-        mask = self.get_mask(frame.shape)
-        if mask is None:
+        if self.roi_bbox is None or self.skip_mask_frames > 0:
             return frame
 
-        masked = frame.copy()
-        masked[mask == 0] = 0
+        # The ROI is a full-width band: copy it into a black frame
+        _, y_top, _, y_bottom = self.roi_bbox
+        masked = np.zeros_like(frame)
+        masked[y_top:y_bottom] = frame[y_top:y_bottom]
         return masked
 
     def crop_roi(self, frame: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
@@ -119,25 +133,24 @@ class ROIMasker:
             if center_y < y_top or center_y > y_bottom:
                 clipped += 1
 
-        self.total_detection_count += len(detections)
-        self.clipped_detection_count += clipped
+        self.clip_ratio += CLIP_RATIO_ALPHA * (clipped / len(detections) - self.clip_ratio)
 
         # If >30% clipped over recent frames, skip masking
-        if self.total_detection_count > 0:
-            clip_ratio = self.clipped_detection_count / self.total_detection_count
-            if clip_ratio > 0.3:
-                self.skip_mask_frames = 30  # Skip for 30 frames
+        if self.clip_ratio > CLIP_RATIO_MAX:
+            # Warn when a skip window starts, not on every frame in it
+            if self.skip_mask_frames == 0:
                 logger.warning(
-                    f"ROI masking skipped: {clip_ratio:.1%} detections would be clipped"
+                    "ROI masking skipped: %.1f%% detections would be clipped",
+                    self.clip_ratio * 100,
                 )
-                return True
+            self.skip_mask_frames = 30  # Skip for 30 frames
+            return True
 
         return False
 
     def reset_clipping_stats(self):
         """Reset clipping statistics."""
-        self.clipped_detection_count = 0
-        self.total_detection_count = 0
+        self.clip_ratio = 0.0
 
     def update_skip_counter(self):
         """Update skip counter (call each frame)."""
@@ -6,7 +6,8 @@ import queue
 import sqlite3
 import threading
 import time
-from datetime import datetime, timezone
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List
 
@@ -16,6 +17,60 @@ logger = logging.getLogger(__name__)
 
 Event = dict
 
+# Max events inserted per transaction by the writer thread
+WRITE_BATCH_SIZE = 128
+
+# Seconds stop() waits for queued events to be written
+STOP_TIMEOUT = 5.0
+
+# Per-connection tuning: 256 MiB mmap reads, 64 MB page cache, in-memory temp tables
+CONNECTION_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Prepared once by sqlite3's statement cache and reused for every batch
+INSERT_EVENT_SQL = (
+    "INSERT INTO cup_events(ts_utc, day_key, direction, track_id, x1, y1, x2, y2, conf) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Adds one batch's per-day counts to the running daily rollup
+UPSERT_ROLLUP_SQL = (
+    "INSERT INTO rollups_daily(day, in_count, out_count, net_count) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(day) DO UPDATE SET "
+    "in_count = in_count + excluded.in_count, "
+    "out_count = out_count + excluded.out_count, "
+    "net_count = net_count + excluded.net_count"
+)
+
+# Schema version stored in PRAGMA user_version; 1 = rollups maintained on write,
+# 2 = ts_utc as INTEGER epoch microseconds plus a YYYYMMDD day_key
+SCHEMA_VERSION = 2
+
+# Origin of the stored ts_utc (microseconds since the Unix epoch, UTC)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _parse_ts(ts_iso: str) -> datetime:
+    """Parse an ISO8601 event timestamp to UTC (naive values are taken as UTC)."""
+    dt = datetime.fromisoformat(ts_iso)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _day_key(day: str) -> int:
+    """YYYY-MM-DD -> YYYYMMDD."""
+    return int(day.replace("-", ""))
+
+
+def _format_ts(ts_us: int) -> str:
+    """Stored epoch microseconds -> ISO8601 UTC string."""
+    return to_iso8601(EPOCH + ts_us * MICROSECOND)
+
 
 class Storage:
     """Async SQLite storage with daily rollups and CSV export."""
@@ -33,7 +88,13 @@ class Storage:
         # Initialize database
         self._init_db()
 
-        # Async writer queue
+        # Per-thread read-only connection, reused across queries; every open
+        # reader is also tracked so stop() can close those of other threads
+        self._reader_tls = threading.local()
+        self._readers = set()
+        self._readers_lock = threading.Lock()
+
+        # Async writer queue (one item per write_events() call, None stops)
         self.write_queue = queue.Queue(maxsize=1000)
         self.writer_thread = None
         self.running = False
@@ -44,20 +105,75 @@ class Storage:
         # Schedule daily export
         self._schedule_daily_export()
 
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Open a connection with the storage pragmas applied."""
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=check_same_thread)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if self.wal_mode:
+            # WAL stays consistent without an fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA wal_autocheckpoint=1000")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection, opening it on first use.
+
+        A connection closed by stop() is replaced by a new one.
+        """
+        conn = getattr(self._reader_tls, "conn", None)
+        if conn is None or conn not in self._readers:
+            # Only used by this thread, but stop() may close it from another
+            conn = self._connect(check_same_thread=False)
+            conn.execute("PRAGMA query_only=1")
+            conn.row_factory = sqlite3.Row
+            with self._readers_lock:
+                self._readers.add(conn)
+            self._reader_tls.conn = conn
+        return conn
+
     def _init_db(self):
-        """Initialize SQLite database schema."""
-        conn = sqlite3.connect(str(self.db_path))
+        """Initialize SQLite database schema, migrating older layouts."""
+        # Autocommit mode: the schema work below runs in one explicit transaction
+        conn = sqlite3.connect(str(self.db_path), isolation_level=None)
         cursor = conn.cursor()
 
         if self.wal_mode:
+            # Persistent in the database file, so later connections inherit it
             cursor.execute("PRAGMA journal_mode=WAL")
 
-        # Events table
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            self._create_schema(cursor)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        logger.info(f"Database initialized: {self.db_path}")
+
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """Create tables and indexes and migrate older data (inside a transaction)."""
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(cup_events)")]
+        if columns and "day_key" not in columns:
+            # TEXT ts_utc table: set it aside and copy it over below
+            cursor.execute("DROP INDEX IF EXISTS idx_ts_utc")
+            cursor.execute("DROP INDEX IF EXISTS idx_day")
+            cursor.execute("ALTER TABLE cup_events RENAME TO cup_events_v1")
+        legacy_events = version < 2 and cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cup_events_v1'"
+        ).fetchone()
+
+        # Events table (ts_utc is epoch microseconds, day_key is YYYYMMDD UTC)
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS cup_events(
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts_utc TEXT NOT NULL,
+                ts_utc INTEGER NOT NULL,
+                day_key INTEGER NOT NULL,
                 direction TEXT NOT NULL,
                 track_id INTEGER,
                 x1 REAL, y1 REAL, x2 REAL, y2 REAL,
@@ -83,12 +199,69 @@ class Storage:
             "CREATE INDEX IF NOT EXISTS idx_ts_utc ON cup_events(ts_utc)"
         )
         cursor.execute(
-            "CREATE INDEX IF NOT EXISTS idx_day ON cup_events(DATE(ts_utc))"
+            "CREATE INDEX IF NOT EXISTS idx_day ON cup_events(day_key)"
         )
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Database initialized: {self.db_path}")
+        if legacy_events:
+            self._migrate_legacy_events(cursor)
+
+        # Databases from before rollups were kept on write: rebuild them once
+        if version < 1 or legacy_events:
+            cursor.execute("DELETE FROM rollups_daily")
+            cursor.execute(
+                """
+                INSERT INTO rollups_daily(day, in_count, out_count, net_count)
+                SELECT
+                    printf('%04d-%02d-%02d', day_key / 10000, day_key / 100 % 100, day_key % 100),
+                    COUNT(*) FILTER (WHERE direction = 'in'),
+                    COUNT(*) FILTER (WHERE direction = 'out'),
+                    COUNT(*) FILTER (WHERE direction = 'in')
+                        - COUNT(*) FILTER (WHERE direction = 'out')
+                FROM cup_events
+                GROUP BY day_key
+            """
+            )
+        cursor.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _migrate_legacy_events(self, cursor: sqlite3.Cursor):
+        """Copy TEXT-timestamp events from cup_events_v1 into cup_events.
+
+        Rows whose timestamp does not parse are skipped and left alone in
+        cup_events_v1; the table is dropped only when every row was copied.
+        """
+        # Keep the original ids unless events were already written alongside
+        keep_ids = cursor.execute("SELECT 1 FROM cup_events LIMIT 1").fetchone() is None
+
+        rows = []
+        migrated = []
+        skipped = 0
+        for row in cursor.execute(
+            "SELECT id, ts_utc, direction, track_id, x1, y1, x2, y2, conf FROM cup_events_v1"
+        ).fetchall():
+            try:
+                dt = _parse_ts(row[1])
+            except (TypeError, ValueError):
+                logger.warning(f"Skipping event {row[0]} with bad timestamp {row[1]!r}")
+                skipped += 1
+                continue
+            migrated.append(row)
+            event_id = row[0] if keep_ids else None
+            day_key = _day_key(dt.date().isoformat())
+            rows.append((event_id, (dt - EPOCH) // MICROSECOND, day_key, *row[2:]))
+
+        cursor.executemany(
+            "INSERT INTO cup_events(id, ts_utc, day_key, direction, track_id, x1, y1, x2, y2, conf) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        if skipped:
+            cursor.executemany(
+                "DELETE FROM cup_events_v1 WHERE id = ?", ((row[0],) for row in migrated)
+            )
+            logger.warning(f"{skipped} events with bad timestamps kept in cup_events_v1")
+        else:
+            cursor.execute("DROP TABLE cup_events_v1")
+        logger.info(f"Migrated {len(rows)} events to integer timestamps")
 
     def start(self):
         """Start async writer thread."""
@@ -101,121 +274,102 @@ class Storage:
         logger.info("Storage writer thread started")
 
     def stop(self):
-        """Stop writer thread and flush queue."""
+        """Stop writer thread after flushing queued events, and close all readers."""
+        if not self.running:
+            return
+
         self.running = False
-        if self.writer_thread:
-            # Wait for queue to drain
-            self.write_queue.join()
-            self.writer_thread.join(timeout=5.0)
+        try:
+            self.write_queue.put(None, timeout=STOP_TIMEOUT)
+        except queue.Full:
+            logger.warning("Write queue full at shutdown, queued events may be lost")
+        self.writer_thread.join(timeout=STOP_TIMEOUT)
+
+        with self._readers_lock:
+            readers, self._readers = self._readers, set()
+        for conn in readers:
+            conn.close()
         logger.info("Storage writer thread stopped")
 
     def _writer_loop(self):
-        """Background thread that writes events to database."""
-        conn = sqlite3.connect(str(self.db_path))
-        if self.wal_mode:
-            conn.execute("PRAGMA journal_mode=WAL")
-
-        while self.running:
-            try:
-                # Get batch of events (with timeout)
-                events = []
+        """Background thread that writes queued events in batched transactions."""
+        conn = self._connect()
+
+        stopping = False
+        while not stopping:
+            batch = self.write_queue.get()
+            if batch is None:
+                break
+
+            # Coalesce whatever else is queued into one transaction
+            events = list(batch)
+            while len(events) < WRITE_BATCH_SIZE:
                 try:
-                    event = self.write_queue.get(timeout=1.0)
-                    events.append(event)
-                    # Try to get more events in batch
-                    while len(events) < 100:
-                        try:
-                            event = self.write_queue.get_nowait()
-                            events.append(event)
-                        except queue.Empty:
-                            break
+                    batch = self.write_queue.get_nowait()
                 except queue.Empty:
-                    continue
+                    break
+                if batch is None:
+                    stopping = True
+                    break
+                events.extend(batch)
 
-                # Write batch
-                cursor = conn.cursor()
+            try:
+                rows = []
+                days_in = Counter()
+                days_out = Counter()
                 for event in events:
-                    cursor.execute(
-                        """
-                        INSERT INTO cup_events(ts_utc, direction, track_id, x1, y1, x2, y2, conf)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
+                    dt = _parse_ts(event["ts_utc"])
+                    day = dt.date().isoformat()
+                    rows.append(
                         (
-                            event["ts_utc"],
+                            (dt - EPOCH) // MICROSECOND,
+                            _day_key(day),
                             event["direction"],
                             event.get("track_id"),
-                            event["bbox"][0],
-                            event["bbox"][1],
-                            event["bbox"][2],
-                            event["bbox"][3],
+                            *event["bbox"][:4],
                             event["conf"],
-                        ),
+                        )
                     )
-
-                conn.commit()
-
-                # Mark tasks as done
-                for _ in events:
-                    self.write_queue.task_done()
-
+                    if event["direction"] == "in":
+                        days_in[day] += 1
+                    elif event["direction"] == "out":
+                        days_out[day] += 1
+                rollups = [
+                    (day, days_in[day], days_out[day], days_in[day] - days_out[day])
+                    for day in days_in.keys() | days_out.keys()
+                ]
+                with conn:
+                    conn.executemany(INSERT_EVENT_SQL, rows)
+                    conn.executemany(UPSERT_ROLLUP_SQL, rollups)
             except Exception as e:
                 logger.error(f"Storage writer error: {e}")
 
         conn.close()
 
     def write_events(self, events: List[Event]):
-        """Queue events for async write."""
-        for event in events:
-            try:
-                self.write_queue.put_nowait(event)
-            except queue.Full:
-                logger.warning("Write queue full, dropping event")
+        """Queue events for async write (non-blocking)."""
+        if not events:
+            return
+        try:
+            self.write_queue.put_nowait(list(events))
+        except queue.Full:
+            logger.warning(f"Write queue full, dropping {len(events)} events")
 
-    def rollup_day(self, day: str) -> dict | None:
-        """Calculate and store daily rollup.
+    def rollup_day(self, day: str) -> dict:
+        """Get the daily rollup, which the writer keeps current on insert.
 
         Args:
             day: Date string (YYYY-MM-DD)
 
         Returns:
-            Rollup dict or None
+            Rollup dict (zero counts if the day has no events)
         """
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-
-        # Calculate rollup
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(*) FILTER (WHERE direction = 'in') as in_count,
-                COUNT(*) FILTER (WHERE direction = 'out') as out_count
-            FROM cup_events
-            WHERE DATE(ts_utc) = ?
-        """,
-            (day,),
-        )
-
-        row = cursor.fetchone()
-        if row:
-            in_count, out_count = row[0] or 0, row[1] or 0
-            net_count = in_count - out_count
-
-            # Upsert rollup
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO rollups_daily(day, in_count, out_count, net_count)
-                VALUES (?, ?, ?, ?)
-            """,
-                (day, in_count, out_count, net_count),
-            )
-
-            conn.commit()
-            conn.close()
-
-            return {"day": day, "in_count": in_count, "out_count": out_count, "net_count": net_count}
-
-        conn.close()
-        return None
+        return self.get_daily_rollup(day) or {
+            "day": day,
+            "in_count": 0,
+            "out_count": 0,
+            "net_count": 0,
+        }
 
     def get_events(self, day: str | None = None, limit: int = 1000) -> List[dict]:
         """Get events from database.
@@ -227,19 +381,17 @@ class Storage:
         Returns:
             List of event dicts
         """
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self._reader().cursor()
 
         if day:
             cursor.execute(
                 """
                 SELECT * FROM cup_events
-                WHERE DATE(ts_utc) = ?
+                WHERE day_key = ?
                 ORDER BY ts_utc DESC
                 LIMIT ?
             """,
-                (day, limit),
+                (_day_key(day), limit),
             )
         else:
             cursor.execute(
@@ -255,7 +407,7 @@ class Storage:
         events = [
             {
                 "id": row["id"],
-                "ts_utc": row["ts_utc"],
+                "ts_utc": _format_ts(row["ts_utc"]),
                 "direction": row["direction"],
                 "track_id": row["track_id"],
                 "bbox": [row["x1"], row["y1"], row["x2"], row["y2"]],
@@ -263,8 +415,6 @@ class Storage:
             }
             for row in rows
         ]
-
-        conn.close()
         return events
 
     def export_csv(self, day: str, csv_dir: Path | None = None) -> Path:
@@ -325,14 +475,9 @@ class Storage:
 
     def get_daily_rollup(self, day: str) -> dict | None:
         """Get stored daily rollup."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM rollups_daily WHERE day = ?", (day,))
-        row = cursor.fetchone()
-
-        conn.close()
+        row = self._reader().execute(
+            "SELECT * FROM rollups_daily WHERE day = ?", (day,)
+        ).fetchone()
 
         if row:
             return {
@@ -1,7 +1,7 @@
 """Object tracking with ByteTrack or OCSORT."""
 
 import logging
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 import numpy as np
 
@@ -12,9 +12,46 @@ Detection = Tuple[float, float, float, float, float, int]
 # TrackedDetection format: (x1, y1, x2, y2, conf, cls_id, track_id)
 TrackedDetection = Tuple[float, float, float, float, float, int, int]
 
+# Initial rows in ByteTracker's track arrays (doubled when full)
+TRACK_CAPACITY = 64
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) x1, y1, x2, y2 boxes.
+
+    Returns (N, M) float64 array; boxes with no overlap get 0.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(1, -1, 4)
+
+    # Intersection (clipped at zero for disjoint boxes)
+    iw = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+    ih = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+    inter = np.where((iw > 0) & (ih > 0), iw * ih, 0.0)
+
+    # Union
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def _best_match(ious: np.ndarray, thresh: float) -> int:
+    """Index of the first best IoU at or above thresh, or -1."""
+    if ious.size == 0:
+        return -1
+    idx = int(np.argmax(ious))
+    return idx if ious[idx] > 0 and ious[idx] >= thresh else -1
+
 
 class ByteTracker:
-    """Simplified ByteTrack implementation."""
+    """Simplified ByteTrack implementation.
+
+    Track state is kept as parallel arrays (struct of arrays), in creation
+    order, so association reads boxes without rebuilding per-track tuples.
+    """
 
     def __init__(self, config):
         self.config = config
@@ -23,24 +60,39 @@ class ByteTracker:
         self.min_box_area = config.tracking.min_box_area
         self.lost_ttl = config.tracking.lost_ttl
 
-        self.tracks = {}  # track_id -> {bbox, conf, cls_id, age, lost_frames}
+        # Rows [0, _n) are live tracks
+        self._n = 0
+        self._track_ids = np.zeros(TRACK_CAPACITY, dtype=np.int64)
+        self._bbox = np.zeros((TRACK_CAPACITY, 4), dtype=np.float64)
+        self._conf = np.zeros(TRACK_CAPACITY, dtype=np.float64)
+        self._cls = np.zeros(TRACK_CAPACITY, dtype=np.int64)
+        self._age = np.zeros(TRACK_CAPACITY, dtype=np.int64)
+        self._lost = np.zeros(TRACK_CAPACITY, dtype=np.int64)
         self.next_track_id = 1
 
+    @property
+    def tracks(self) -> Dict[int, dict]:
+        """Snapshot of live tracks: track_id -> {bbox, conf, cls_id, age, lost_frames}."""
+        return {int(self._track_ids[i]): self._track_dict(i) for i in range(self._n)}
+
+    def _track_dict(self, i: int) -> dict:
+        return {
+            "bbox": tuple(self._bbox[i].tolist()),
+            "conf": float(self._conf[i]),
+            "cls_id": int(self._cls[i]),
+            "age": int(self._age[i]),
+            "lost_frames": int(self._lost[i]),
+        }
+
     def _iou(self, box1: Tuple[float, float, float, float], box2: Tuple[float, float, float, float]) -> float:
         """Calculate IoU between two boxes."""
         x1_1, y1_1, x2_1, y2_1 = box1
         x1_2, y1_2, x2_2, y2_2 = box2
 
-        # Intersection
-        xi1 = max(x1_1, x1_2)
-        yi1 = max(y1_1, y1_2)
-        xi2 = min(x2_1, x2_2)
-        yi2 = min(y2_1, y2_2)
-
-        if xi2 <= xi1 or yi2 <= yi1:
-            return 0.0
-
-        inter_area = (xi2 - xi1) * (yi2 - yi1)
+        # Intersection (clamped at zero for disjoint boxes)
+        inter_w = max(0.0, min(x2_1, x2_2) - max(x1_1, x1_2))
+        inter_h = max(0.0, min(y2_1, y2_2) - max(y1_1, y1_2))
+        inter_area = inter_w * inter_h
 
         # Union
         box1_area = (x2_1 - x1_1) * (y2_1 - y1_1)
@@ -54,16 +106,40 @@ class ByteTracker:
         x1, y1, x2, y2 = bbox
         return (x2 - x1) * (y2 - y1)
 
+    def _set_track(self, i: int, det: Detection, age: int):
+        """Point row i at a detection with lost_frames reset."""
+        self._bbox[i] = det[:4]
+        self._conf[i] = det[4]
+        self._cls[i] = det[5]
+        self._age[i] = age
+        self._lost[i] = 0
+
+    def _append_track(self, det: Detection) -> int:
+        """Start a new track row for det and return its track_id."""
+        if self._n == len(self._track_ids):
+            size = 2 * self._n
+            for name in ("_track_ids", "_bbox", "_conf", "_cls", "_age", "_lost"):
+                arr = getattr(self, name)
+                grown = np.zeros((size,) + arr.shape[1:], dtype=arr.dtype)
+                grown[: self._n] = arr
+                setattr(self, name, grown)
+
+        track_id = self.next_track_id
+        self.next_track_id += 1
+        self._track_ids[self._n] = track_id
+        self._set_track(self._n, det, 1)
+        self._n += 1
+        return track_id
+
     def update(self, detections: List[Detection]) -> List[TrackedDetection]:
         """Update tracks with new detections.
 
         Returns list of TrackedDetection (x1, y1, x2, y2, conf, cls_id, track_id).
         """
         # Filter by min area
+        min_area = self.min_box_area
         valid_dets = [
-            det
-            for det in detections
-            if self._area((det[0], det[1], det[2], det[3])) >= self.min_box_area
+            det for det in detections if (det[2] - det[0]) * (det[3] - det[1]) >= min_area
         ]
 
         # Split into high and low confidence
@@ -71,95 +147,77 @@ class ByteTracker:
         low_conf = [d for d in valid_dets if d[4] < self.track_thresh]
 
         # Match high confidence detections to existing tracks
-        matched_tracks = set()
+        n = self._n
+        matched = np.zeros(n, dtype=bool)
         matched_dets = set()
         tracked = []
 
-        for track_id, track in self.tracks.items():
-            if track["lost_frames"] > 0:
-                continue  # Skip lost tracks for high-conf matching
-
-            best_iou = 0.0
-            best_det_idx = -1
+        # IoU of every active track against every high-conf detection at once
+        active_rows = np.flatnonzero(self._lost[:n] == 0).tolist()
+        ious = iou_matrix(self._bbox[active_rows], [det[:4] for det in high_conf])
 
-            for idx, det in enumerate(high_conf):
-                if idx in matched_dets:
-                    continue
-
-                iou = self._iou(
-                    (track["bbox"][0], track["bbox"][1], track["bbox"][2], track["bbox"][3]),
-                    (det[0], det[1], det[2], det[3]),
-                )
+        # Taking a detection only lowers IoUs, so rows with no candidate now never match
+        candidate_rows = np.flatnonzero(
+            ((ious > 0) & (ious >= self.match_thresh)).any(axis=1)
+        ).tolist()
 
-                if iou > best_iou and iou >= self.match_thresh:
-                    best_iou = iou
-                    best_det_idx = idx
+        for row in candidate_rows:
+            i = active_rows[row]
+            best_det_idx = _best_match(ious[row], self.match_thresh)
 
             if best_det_idx >= 0:
+                ious[:, best_det_idx] = -1.0  # Detection taken
                 # Update track
                 det = high_conf[best_det_idx]
-                self.tracks[track_id] = {
-                    "bbox": (det[0], det[1], det[2], det[3]),
-                    "conf": det[4],
-                    "cls_id": det[5],
-                    "age": track["age"] + 1,
-                    "lost_frames": 0,
-                }
-                matched_tracks.add(track_id)
+                self._set_track(i, det, self._age[i] + 1)
+                matched[i] = True
                 matched_dets.add(best_det_idx)
-                tracked.append((det[0], det[1], det[2], det[3], det[4], det[5], track_id))
+                tracked.append(
+                    (det[0], det[1], det[2], det[3], det[4], det[5], int(self._track_ids[i]))
+                )
 
         # Create new tracks for unmatched high-conf detections
         for idx, det in enumerate(high_conf):
             if idx not in matched_dets:
-                track_id = self.next_track_id
-                self.next_track_id += 1
-                self.tracks[track_id] = {
-                    "bbox": (det[0], det[1], det[2], det[3]),
-                    "conf": det[4],
-                    "cls_id": det[5],
-                    "age": 1,
-                    "lost_frames": 0,
-                }
+                track_id = self._append_track(det)
                 tracked.append((det[0], det[1], det[2], det[3], det[4], det[5], track_id))
 
-        # Match low confidence detections to lost tracks
-        for track_id, track in list(self.tracks.items()):
-            if track_id in matched_tracks:
-                continue
-
-            if track["lost_frames"] >= self.lost_ttl:
-                # Remove expired track
-                del self.tracks[track_id]
-                continue
-
-            best_iou = 0.0
-            best_det_idx = -1
-
-            for idx, det in enumerate(low_conf):
-                iou = self._iou(
-                    (track["bbox"][0], track["bbox"][1], track["bbox"][2], track["bbox"][3]),
-                    (det[0], det[1], det[2], det[3]),
-                )
-
-                if iou > best_iou and iou >= self.match_thresh:
-                    best_iou = iou
-                    best_det_idx = idx
-
-            if best_det_idx >= 0:
-                # Reactivate track
-                det = low_conf[best_det_idx]
-                self.tracks[track_id] = {
-                    "bbox": (det[0], det[1], det[2], det[3]),
-                    "conf": det[4],
-                    "cls_id": det[5],
-                    "age": track["age"] + 1,
-                    "lost_frames": 0,
-                }
-                tracked.append((det[0], det[1], det[2], det[3], det[4], det[5], track_id))
-            else:
-                # Increment lost frames
-                self.tracks[track_id]["lost_frames"] += 1
+        # Match low confidence detections to lost tracks (new tracks included);
+        # expired ones are dropped below
+        unmatched = np.ones(self._n, dtype=bool)
+        unmatched[:n] = ~matched
+        expired = unmatched & (self._lost[: self._n] >= self.lost_ttl)
+        unmatched_rows = np.flatnonzero(unmatched & ~expired).tolist()
+
+        ious = iou_matrix(self._bbox[unmatched_rows], [det[:4] for det in low_conf])
+
+        # Lost tracks do not take detections from each other: best per row at once
+        if low_conf and unmatched_rows:
+            best = ious.argmax(axis=1)
+            best_iou = ious[np.arange(len(unmatched_rows)), best]
+            hit = (best_iou > 0) & (best_iou >= self.match_thresh)
+        else:
+            best = np.zeros(len(unmatched_rows), dtype=np.intp)
+            hit = np.zeros(len(unmatched_rows), dtype=bool)
+
+        for row in np.flatnonzero(hit).tolist():
+            # Reactivate track
+            i = unmatched_rows[row]
+            det = low_conf[best[row]]
+            self._set_track(i, det, self._age[i] + 1)
+            tracked.append(
+                (det[0], det[1], det[2], det[3], det[4], det[5], int(self._track_ids[i]))
+            )
+
+        # Increment lost frames
+        self._lost[np.asarray(unmatched_rows, dtype=np.intp)[~hit]] += 1
+
+        # Compact out expired tracks, keeping creation order
+        if expired.any():
+            keep = np.flatnonzero(~expired)
+            self._n = len(keep)
+            for arr in (self._track_ids, self._bbox, self._conf, self._cls, self._age, self._lost):
+                arr[: self._n] = arr[keep]
 
         return tracked
 
@@ -2,6 +2,9 @@
 
 import itertools
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Tuple
 
@@ -9,8 +12,61 @@ import cv2
 import numpy as np
 import yaml
 
+from core.config import YAML_DUMPER, YAML_LOADER
+
 logger = logging.getLogger(__name__)
 
+# Per-process replay inputs, set once by _init_worker so tasks only carry params
+_worker_state: Tuple | None = None
+
+
+def _init_worker(*state):
+    """Pool initializer: keep the replay inputs for every task in this worker."""
+    global _worker_state
+    _worker_state = state
+
+
+def _evaluate_worker(params: Dict) -> Tuple[List[Dict], Dict[int, int]]:
+    """Pool task: replay this worker's cached detections with params."""
+    return _replay(params, *_worker_state)
+
+
+def _replay(
+    params: Dict,
+    raw_per_frame: List,
+    postproc_fn,
+    tracker_fn,
+    counter_fn,
+) -> Tuple[List[Dict], Dict[int, int]]:
+    """Replay cached raw detections with one parameter set.
+
+    Returns (events, track_id -> crossing count).
+    """
+    # Reset components for this run
+    tracker = tracker_fn(params)
+    counter = counter_fn(params)
+
+    events = []
+    track_crossings = {}  # track_id -> count
+
+    for raw_detections in raw_per_frame:
+        # Post-process with params
+        detections = postproc_fn(raw_detections, params)
+
+        # Track with params
+        tracked_dets = tracker.update(detections)
+
+        # Count
+        run_events = counter.update(tracked_dets, datetime.now(timezone.utc))
+
+        # Aggregate
+        events.extend(run_events)
+        for event in run_events:
+            track_id = event.get("track_id", 0)
+            track_crossings[track_id] = track_crossings.get(track_id, 0) + 1
+
+    return events, track_crossings
+
 
 class ParameterTuner:
     """Tune parameters via grid search on replay clips."""
@@ -25,6 +81,7 @@ class ParameterTuner:
         self.grid = config.tuner.grid
         self.optimize_for = config.tuner.optimize_for
         self.keep_best_profile = config.tuner.keep_best_profile
+        self.workers = config.tuner.workers or os.cpu_count() or 1
 
     def generate_grid(self) -> List[Dict]:
         """Generate parameter combinations from grid."""
@@ -98,7 +155,7 @@ class ParameterTuner:
 
         Args:
             clip_path: Path to video file
-            infer_fn: Function(frame) -> detections
+            infer_fn: Function(frame) -> detections, run once per frame for the whole grid
             postproc_fn: Function(detections, params) -> filtered_detections
             tracker_fn: Function(detections, params) -> tracked_detections
             counter_fn: Function(tracked_detections) -> events
@@ -116,54 +173,37 @@ class ParameterTuner:
             logger.error(f"Failed to open clip: {clip_path}")
             return {}
 
+        # Decode and infer once: raw detections do not depend on the grid params
+        raw_per_frame = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            raw_per_frame.append(infer_fn(frame))
+        cap.release()
+
         # Generate parameter grid
         param_combos = self.generate_grid()
-        logger.info(f"Testing {len(param_combos)} parameter combinations")
+        logger.info(
+            f"Testing {len(param_combos)} parameter combinations on {len(raw_per_frame)} frames"
+        )
 
         best_score = -1.0
         best_params = None
         all_scores = []
 
-        for params in param_combos:
-            logger.debug(f"Testing params: {params}")
-
-            # Reset components for this run
-            tracker = tracker_fn(params)
-            counter = counter_fn(params)
-
-            # Process clip with these params
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Rewind
-            events = []
-            track_crossings = {}  # track_id -> count
-
-            frame_count = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # Inference
-                raw_detections = infer_fn(frame)
-
-                # Post-process with params
-                detections = postproc_fn(raw_detections, params)
-
-                # Track with params
-                tracked_dets = tracker.update(detections)
-
-                # Count
-                from datetime import datetime, timezone
-
-                run_events = counter.update(tracked_dets, datetime.now(timezone.utc))
-
-                # Aggregate
-                events.extend(run_events)
-                for event in run_events:
-                    track_id = event.get("track_id", 0)
-                    track_crossings[track_id] = track_crossings.get(track_id, 0) + 1
-
-                frame_count += 1
-
+        replay_args = (raw_per_frame, postproc_fn, tracker_fn, counter_fn)
+        workers = min(self.workers, len(param_combos))
+        if workers > 1:
+            # Combos are independent; the callables must be picklable (module-level)
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=replay_args
+            ) as pool:
+                runs = list(pool.map(_evaluate_worker, param_combos))
+        else:
+            runs = (_replay(params, *replay_args) for params in param_combos)
+
+        for params, (events, track_crossings) in zip(param_combos, runs):
             # Score this run
             score = self.score_run(events, track_crossings)
             all_scores.append((params, score))
@@ -174,8 +214,6 @@ class ParameterTuner:
                 best_score = score
                 best_params = params
 
-        cap.release()
-
         logger.info(f"Best params: {best_params} (score={best_score:.2f})")
 
         return {
@@ -201,7 +239,7 @@ class ParameterTuner:
         }
 
         with open(output_path, "w") as f:
-            yaml.dump(override, f, default_flow_style=False)
+            yaml.dump(override, f, Dumper=YAML_DUMPER, default_flow_style=False)
 
         logger.info(f"Best profile saved to {output_path}")
 
@@ -211,8 +249,8 @@ class ParameterTuner:
         if not override_path.exists():
             return None
 
-        with open(override_path, "r") as f:
-            data = yaml.safe_load(f)
+        with open(override_path, "rb") as f:
+            data = yaml.load(f, Loader=YAML_LOADER)
 
         params = {}
         if "model" in data and "conf_thresh" in data["model"]:
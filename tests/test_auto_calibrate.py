@@ -3,11 +3,14 @@
 import sys
 from pathlib import Path
 
+import numpy as np
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from apps.auto_calibrate import AutoCalibrator
 from core.config import AppConfig
+from core.hailo_line_proposer import HailoLineProposer, decode_line_peaks
 
 
 def test_line_proposal():
@@ -48,6 +51,22 @@ def test_flow_direction():
     assert "counter_to_bar" in flow_stats
 
 
+def test_flow_counts():
+    """Test flow counts ignore short and stationary tracks."""
+    config = AppConfig()
+    calibrator = AutoCalibrator(config)
+
+    trajectories = {
+        1: [(100, 200 - 10 * i) for i in range(5)],  # Up
+        2: [(200, 100 + 10 * i) for i in range(6)],  # Down
+        3: [(300, 100 + i) for i in range(5)],  # Stationary
+        4: [(400, 200), (400, 100)],  # Too short
+    }
+
+    flow_stats, _ = calibrator.compute_flow_vectors(trajectories)
+    assert flow_stats == {"bar_to_counter": 1, "counter_to_bar": 1}
+
+
 def test_segment_intersect():
     """Test line segment intersection."""
     config = AppConfig()
@@ -70,6 +89,134 @@ def test_segment_intersect():
     assert result is False
 
 
+def test_count_crossings_matches_scalar():
+    """Test vectorized crossing count agrees with per-segment check."""
+    config = AppConfig()
+    calibrator = AutoCalibrator(config)
+
+    line = (100, 100, 200, 100)
+    trajectories = {
+        1: [(150, 120), (150, 110), (150, 90)],  # Crosses once
+        2: [(120, 80), (120, 120), (130, 80)],  # Crosses twice, counted once
+        3: [(300, 80), (300, 120)],  # Outside line extent
+        4: [(150, 150)],  # Too short
+    }
+
+    expected = 0
+    for points in trajectories.values():
+        for i in range(len(points) - 1):
+            if calibrator._segments_intersect((points[i], points[i + 1]), line[:2], line[2:]):
+                expected += 1
+                break
+
+    segments = calibrator._build_segments(trajectories)
+    counts = calibrator._count_crossings(segments, [line])
+    assert counts.tolist() == [expected] == [2]
+
+
+def test_decode_line_peaks():
+    """Test (rho, theta) score map peaks decode to horizontal lines."""
+    w, h = 640, 480
+    diag = np.hypot(w, h)
+    score_map = np.zeros((200, 180), dtype=np.float32)
+
+    # theta bin 89 -> ~90 deg (horizontal); rho bin -> y ~= 400
+    rho_bin = int((400 + diag) / (2 * diag) * 200)
+    score_map[rho_bin, 89] = 1.0
+    score_map[rho_bin + 1, 89] = 0.8  # Suppressed neighbour
+
+    lines = decode_line_peaks(score_map, (w, h), top_k=3)
+    assert lines.shape == (1, 4)
+    x1, y1, x2, y2 = lines[0]
+    assert (x1, x2) == (0, w - 1)
+    assert abs(y1 - 400) < 10 and abs(y2 - 400) < 10
+
+
+def test_steep_line_peaks_clipped_to_frame():
+    """Test lines leaving through the top/bottom edge are clipped to the frame."""
+    w, h = 640, 480
+    score_map = np.zeros((200, 180), dtype=np.float32)
+    score_map[120, 30] = 1.0  # theta ~30 deg
+
+    lines = decode_line_peaks(score_map, (w, h), top_k=3)
+    assert lines.shape == (1, 4)
+    assert (lines[:, [0, 2]] >= 0).all() and (lines[:, [0, 2]] < w).all()
+    assert (lines[:, [1, 3]] >= 0).all() and (lines[:, [1, 3]] < h).all()
+
+
+def test_line_proposer_runs_on_detection_device(tmp_path):
+    """Test the line proposer loads its HEF through the detection HailoInfer."""
+    config = AppConfig()
+    config.autocal.line_hef_path = str(tmp_path / "line_proposer.hef")
+    Path(config.autocal.line_hef_path).touch()
+
+    class Infer:
+        def load_aux(self, hef_path):
+            self.hef_path = hef_path
+            return "aux"
+
+        def infer_aux(self, aux, input_data):
+            assert aux == "aux" and input_data.shape == (1, 1, 256, 256)
+            score_map = np.zeros((200, 180), dtype=np.float32)
+            score_map[150, 89] = 1.0
+            return score_map[None]
+
+    infer = Infer()
+    proposer = HailoLineProposer(config, infer)
+    assert proposer.available and infer.hef_path == Path(config.autocal.line_hef_path)
+    assert proposer.propose(np.zeros((480, 640), dtype=np.uint8), top_k=3).shape == (1, 4)
+
+
+def test_full_trajectory_keeps_latest_point():
+    """Test a track longer than max_track_len still ends at its latest centroid."""
+    config = AppConfig()
+    config.autocal.enabled = True
+    config.autocal.max_track_len = 3
+    calibrator = AutoCalibrator(config)
+
+    class Camera:
+        def frames(self):
+            for i in range(6):
+                yield np.zeros((48, 64, 3), dtype=np.uint8), i
+
+    class Stub:
+        y = 0
+
+        def infer(self, frame):
+            return []
+
+        def process(self, raw):
+            return raw
+
+        def update(self, dets):
+            self.y += 10
+            return [(0.0, self.y, 10.0, self.y + 10.0, 0.9, 41, 1)]
+
+    stub = Stub()
+    _, _, trajectories = calibrator.collect_warmup_data(Camera(), stub, stub, stub)
+
+    assert trajectories[1].tolist() == [[5.0, 15.0], [5.0, 25.0], [5.0, 65.0]]
+
+
+def test_empty_line_proposal_falls_back_to_hough():
+    """Test an empty line proposal still runs the Hough search."""
+    config = AppConfig()
+    config.autocal.enabled = True
+    calibrator = AutoCalibrator(config)
+
+    class Proposer:
+        def propose(self, gray, top_k):
+            return np.empty((0, 4), dtype=np.int32)
+
+    hough_calls = []
+    calibrator.line_proposer = Proposer()
+    calibrator._hough_lines = lambda frame: hough_calls.append(frame) or None
+
+    avg_frame = np.zeros((72, 128), dtype=np.uint8)
+    assert calibrator.find_candidate_lines(avg_frame, {1: [(10, 10), (10, 60)]}) == []
+    assert len(hough_calls) == 1
+
+
 if __name__ == "__main__":
     import pytest
 
@@ -0,0 +1,180 @@
+"""Tests for camera frame sources."""
+
+import sys
+import threading
+import types
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+import core.camera
+from core.camera import FrameSource, Picamera2Source
+
+# Pixel byte order of libcamera formats (as returned by capture_array)
+_BYTE_ORDER = {"RGB888": (2, 1, 0), "BGR888": (0, 1, 2)}
+
+
+class FakeRequest:
+    """Completed capture request holding one frame."""
+
+    def __init__(self, camera):
+        width, height = camera.size
+        rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        rgb[..., 0] = 255  # Red chart
+        self.array = rgb[..., camera.order]
+        self.released = False
+
+    def make_array(self, name):
+        assert not self.released
+        return self.array.copy()
+
+    def release(self):
+        self.released = True
+
+
+class FakeMappedArray:
+    """MappedArray stand-in exposing a request's buffer while in scope."""
+
+    def __init__(self, request, name):
+        self.request = request
+
+    def __enter__(self):
+        assert not self.request.released
+        self.array = self.request.array
+        return self
+
+    def __exit__(self, *exc):
+        self.array = None
+
+
+class FakePicamera2:
+    """Picamera2 stand-in that captures a solid red colour chart."""
+
+    def create_video_configuration(self, main, controls):
+        return {"main": main}
+
+    def configure(self, config):
+        self.size = config["main"]["size"]
+        self.order = _BYTE_ORDER[config["main"]["format"]]
+
+    def start(self):
+        pass
+
+    def capture_request(self):
+        return FakeRequest(self)
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+FAKE_PICAMERA2 = types.SimpleNamespace(Picamera2=FakePicamera2, MappedArray=FakeMappedArray)
+
+
+def test_picamera2_frames_are_bgr(monkeypatch):
+    """Test Picamera2 frames arrive in OpenCV BGR order."""
+    monkeypatch.setitem(sys.modules, "picamera2", FAKE_PICAMERA2)
+
+    source = Picamera2Source(64, 48, fps=1000)
+    frame, _ = next(source.frames())
+    source.close()
+
+    assert frame.shape == (48, 64, 3)
+    assert frame[0, 0].tolist() == [0, 0, 255]  # Red in BGR
+
+
+def test_picamera2_ring_buffer(monkeypatch):
+    """Test rotated Picamera2 frames are written into preallocated ring slots."""
+    monkeypatch.setitem(sys.modules, "picamera2", FAKE_PICAMERA2)
+
+    source = Picamera2Source(64, 48, fps=1000, rotate=90)
+    frames = source.frames()
+    first, _ = next(frames)
+    second, _ = next(frames)
+    source.close()
+
+    assert first.shape == (64, 48, 3)
+    assert first.base is source._rot_ring and second.base is source._rot_ring
+    assert not np.shares_memory(first, second)
+
+
+class CountingSource(FrameSource):
+    """Source yielding frames numbered 0..n-1 as fast as possible."""
+
+    def __init__(self, n):
+        super().__init__(16, 16, 30)
+        self.n = n
+
+    def frames(self):
+        for i in range(self.n):
+            yield self._rotate_frame(np.full((16, 16, 3), i % 256, dtype=np.uint8)), i
+
+    def close(self):
+        pass
+
+
+def test_latest_frame_drops_stale_frames():
+    """Test latest() returns the newest frame and counts the skipped ones."""
+    source = CountingSource(50)
+    source.start_capture()
+    source._capture_thread.join(timeout=2.0)
+
+    assert source.capture_ended
+    frame, timestamp = source.latest(timeout=0.1)
+    assert timestamp == 49
+    assert source.latest(timeout=0.01) is None
+    assert source.dropped_frames == 49
+
+
+def test_latest_frame_detached_from_ring():
+    """Test latest() frames stay intact while capture keeps reusing ring slots."""
+    source = CountingSource(50)
+    source.rotate = 180
+    source.start_capture()
+    source._capture_thread.join(timeout=2.0)
+
+    frame, timestamp = source.latest(timeout=0.1)
+    assert frame.base is None and source._rot_ring is None
+    assert frame[0, 0, 0] == timestamp
+
+
+class BlockingSource(FrameSource):
+    """Source whose frames() blocks until released, like a stalled driver."""
+
+    def __init__(self):
+        super().__init__(16, 16, 30)
+        self.release = threading.Event()
+        self.readers = 0
+
+    def frames(self):
+        self.readers += 1
+        while True:
+            self.release.wait()
+            yield np.zeros((16, 16, 3), dtype=np.uint8), 0
+
+    def close(self):
+        pass
+
+
+def test_stuck_capture_thread_not_replaced(monkeypatch):
+    """Test a capture thread that ignores stop is kept, not joined by a second reader."""
+    monkeypatch.setattr(core.camera, "CAPTURE_STOP_TIMEOUT", 0.05)
+    source = BlockingSource()
+    source.start_capture()
+    stuck = source._capture_thread
+
+    assert not source.stop_capture()
+    assert source._capture_thread is stuck
+    source.start_capture()
+    assert source._capture_thread is stuck and source.readers == 1
+
+    source.release.set()
+    stuck.join(timeout=1.0)
+    source.start_capture()
+    assert source._capture_thread is not stuck and source.readers == 2
+    assert source.stop_capture()
@@ -0,0 +1,52 @@
+"""Tests for configuration loading."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from core.config import AppConfig
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the config cache at a temporary XDG_CACHE_HOME."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache" / "cups-counter"
+
+
+def _write_config(tmp_path, fps):
+    path = tmp_path / "site.yaml"
+    path.write_text(f"camera:\n  fps: {fps}\n")
+    return path
+
+
+def test_config_cached_per_file(tmp_path, cache_dir):
+    """Test a loaded config is cached and reused until the file changes."""
+    path = _write_config(tmp_path, 15)
+    assert AppConfig.from_yaml(path).camera.fps == 15
+    assert len(list(cache_dir.glob("cfg-*.pkl"))) == 1
+    assert AppConfig.from_yaml(path).camera.fps == 15
+
+    path.write_text("camera:\n  fps: 120\n")
+    assert AppConfig.from_yaml(path).camera.fps == 120
+
+
+def test_unreadable_cache_is_a_miss(tmp_path, cache_dir):
+    """Test a corrupt cache entry is ignored and replaced."""
+    path = _write_config(tmp_path, 15)
+    AppConfig.from_yaml(path)
+    (cache_file,) = cache_dir.glob("cfg-*.pkl")
+    cache_file.write_bytes(b"\x80\x05not a pickle")
+
+    assert AppConfig.from_yaml(path).camera.fps == 15
+    assert cache_file.read_bytes() != b"\x80\x05not a pickle"
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__, "-v"])
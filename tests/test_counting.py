@@ -163,8 +163,25 @@ def test_reset():
     assert totals_after["net"] == 0
 
 
+def test_event_wall_time_stamped_on_emission():
+    """Test events get a wall-clock timestamp when none is passed."""
+    config = AppConfig()
+    config.counting.line.start = [100, 100]
+    config.counting.line.end = [200, 100]
+    config.counting.direction = "bar_to_counter"
+    config.counting.min_visible_frames = 1
+
+    counter = LineCounter(config)
+
+    before = datetime.now(timezone.utc)
+    assert counter.update([(150.0, 130.0, 160.0, 140.0, 0.8, 41, 1)]) == []
+    events = counter.update([(150.0, 60.0, 160.0, 70.0, 0.8, 41, 1)])
+
+    assert len(events) == 1
+    assert datetime.fromisoformat(events[0]["ts_utc"]) >= before
+
+
 if __name__ == "__main__":
     import pytest
 
     pytest.main([__file__, "-v"])
-
@@ -0,0 +1,118 @@
+"""Tests for inference batching."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from core.config import AppConfig
+from core.hailo_infer import HailoInfer, InferBatcher
+
+
+class FakeInfer:
+    """Device stand-in returning the frame's mean value as its detection."""
+
+    mock_mode = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def _detect(self, frame):
+        self.calls += 1
+        return [(0.0, 0.0, 10.0, 10.0, float(frame.mean()), 41)]
+
+    def infer_begin(self, frame):
+        return HailoInfer._completed(self._detect(frame))
+
+    def infer_batch_begin(self, frames):
+        return HailoInfer._completed([self._detect(frame) for frame in frames])
+
+    def infer_end(self, token):
+        return token.result()
+
+
+def _frame(value):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+def test_static_frames_reuse_detections():
+    """Test unchanged frames skip inference until the refresh limit."""
+    infer = FakeInfer()
+    batcher = InferBatcher(infer, max_batch=4, static_threshold=2.0, static_refresh=2)
+
+    frames = [_frame(100), _frame(101), _frame(100), _frame(100), _frame(150)]
+    first = batcher.end(batcher.begin(frames[:2]))
+    second = batcher.end(batcher.begin(frames[2:]))
+
+    # Frames 1-2 reuse frame 0, frame 3 hits the refresh limit, frame 4 changed
+    assert infer.calls == 3
+    assert batcher.skipped_frames == 2
+    confs = [dets[0][4] for dets in first + second]
+    assert confs == [100.0, 100.0, 100.0, 100.0, 150.0]
+
+
+def test_small_moving_object_not_static():
+    """Test a small object moving over a still background is always inferred."""
+    infer = FakeInfer()
+    batcher = InferBatcher(infer, max_batch=1, static_threshold=2.0, static_refresh=10)
+
+    for step in range(8):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        x = 100 + 10 * step
+        frame[300:380, x : x + 60] = 200
+        batcher.run([frame])
+
+    assert batcher.skipped_frames == 0
+
+
+def test_static_filter_off_by_default():
+    """Test every frame is inferred without a threshold."""
+    infer = FakeInfer()
+    batcher = InferBatcher(infer, max_batch=4)
+
+    results = batcher.run([_frame(100)] * 3)
+
+    assert infer.calls == 3
+    assert len(results) == 3
+
+
+def test_aux_network_swapped_in_for_one_run():
+    """Test infer_aux runs the auxiliary network and reactivates detection."""
+    log = []
+
+    class NetworkGroup:
+        def __init__(self, name):
+            self.name = name
+
+        def activate(self, params):
+            log.append(("activate", self.name))
+
+        def deactivate(self):
+            log.append(("deactivate", self.name))
+
+        def run(self, input_dict):
+            log.append(("run", self.name))
+            return {"out": np.ones((1, 4), dtype=np.float32)}
+
+    config = AppConfig()
+    config.model.mock_mode = True
+    infer = HailoInfer(config)
+    infer.network_group = NetworkGroup("detect")
+    infer._device_pool = ThreadPoolExecutor(max_workers=1)
+
+    aux = (NetworkGroup("lines"), None, [])
+    output = infer.infer_aux(aux, np.zeros((1, 1, 8, 8), dtype=np.float32))
+    infer._device_pool.shutdown()
+
+    assert output.shape == (1, 4)
+    assert log == [
+        ("deactivate", "detect"),
+        ("activate", "lines"),
+        ("run", "lines"),
+        ("deactivate", "lines"),
+        ("activate", "detect"),
+    ]
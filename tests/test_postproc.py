@@ -44,6 +44,25 @@ def test_class_filtering():
     assert result[0][5] == 41
 
 
+def test_unknown_class_ids_rejected(monkeypatch):
+    """Test negative and out-of-range class IDs never pass the class filter."""
+    monkeypatch.setattr(PostProcessor, "_load_label_map", lambda self: {"person": 0, "cup": 41})
+    config = AppConfig()
+    config.model.class_filter = ["person", "cup"]
+    postproc = PostProcessor(config)
+
+    detections = [
+        (0.0, 0.0, 50.0, 50.0, 0.8, 0),
+        (100.0, 100.0, 150.0, 150.0, 0.8, 41),
+        (200.0, 200.0, 250.0, 250.0, 0.8, -1),
+        (300.0, 300.0, 350.0, 350.0, 0.8, 42),
+        (400.0, 400.0, 450.0, 450.0, 0.8, 1000),
+    ]
+
+    result = postproc.process(detections)
+    assert sorted(det[5] for det in result) == [0, 41]
+
+
 def test_nms():
     """Test that NMS removes overlapping boxes."""
     config = AppConfig()
@@ -0,0 +1,129 @@
+"""Tests for event storage."""
+
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from core.config import AppConfig
+from core.storage import Storage
+
+
+def _storage(tmp_path):
+    config = AppConfig()
+    config.storage.sqlite_path = str(tmp_path / "counts.db")
+    config.storage.csv_dir = str(tmp_path / "csv")
+    return Storage(config)
+
+
+def _event(ts_utc, direction):
+    return {"ts_utc": ts_utc, "direction": direction, "track_id": 1, "bbox": [0, 0, 10, 10], "conf": 0.9}
+
+
+def test_rollups_kept_on_write(tmp_path):
+    """Test the writer keeps per-day rollups in step with inserted events."""
+    storage = _storage(tmp_path)
+    storage.write_events([_event("2024-01-01T23:59:59+00:00", "in")] * 3)
+    storage.write_events(
+        [_event("2024-01-01T08:00:00+00:00", "out"), _event("2024-01-02T00:00:01+00:00", "out")]
+    )
+    storage.stop()
+
+    assert storage.rollup_day("2024-01-01") == {
+        "day": "2024-01-01",
+        "in_count": 3,
+        "out_count": 1,
+        "net_count": 2,
+    }
+    assert storage.rollup_day("2024-01-02")["net_count"] == -1
+    assert storage.rollup_day("2024-01-03")["in_count"] == 0
+    assert len(storage.get_events(day="2024-01-01")) == 4
+
+
+def test_stop_closes_readers_of_all_threads(tmp_path):
+    """Test stop() closes reader connections opened on other threads."""
+    storage = _storage(tmp_path)
+    readers = []
+    worker = threading.Thread(target=lambda: readers.append(storage._reader()))
+    worker.start()
+    worker.join()
+    storage.stop()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        readers[0].execute("SELECT 1")
+    assert storage.rollup_day("2024-01-01")["in_count"] == 0  # Reopened on demand
+
+
+def _legacy_db(tmp_path, timestamps):
+    """Create a database in the TEXT-timestamp layout with one "in" event per timestamp."""
+    conn = sqlite3.connect(str(tmp_path / "counts.db"))
+    conn.execute(
+        """
+        CREATE TABLE cup_events(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts_utc TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            track_id INTEGER,
+            x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+            conf REAL
+        )
+    """
+    )
+    conn.execute("CREATE INDEX idx_day ON cup_events(DATE(ts_utc))")
+    conn.executemany(
+        "INSERT INTO cup_events(ts_utc, direction, track_id, x1, y1, x2, y2, conf) "
+        "VALUES (?, 'in', 1, 0, 0, 10, 10, 0.9)",
+        [(ts,) for ts in timestamps],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_older_database_migrated(tmp_path):
+    """Test a TEXT-timestamp database is converted and its rollups rebuilt.
+
+    Rows with unparsable timestamps are skipped and kept in cup_events_v1.
+    """
+    _legacy_db(
+        tmp_path,
+        ["2024-01-01T12:00:00.250000+00:00", "not a timestamp", "2024-01-01T13:00:00+00:00"],
+    )
+
+    storage = _storage(tmp_path)
+    storage.stop()
+
+    assert storage.rollup_day("2024-01-01")["in_count"] == 2
+    assert [event["ts_utc"] for event in storage.get_events(day="2024-01-01")] == [
+        "2024-01-01T13:00:00+00:00",
+        "2024-01-01T12:00:00.250000+00:00",
+    ]
+
+    conn = sqlite3.connect(str(storage.db_path))
+    stranded = conn.execute("SELECT ts_utc FROM cup_events_v1").fetchall()
+    conn.close()
+    assert stranded == [("not a timestamp",)]
+
+
+def test_failed_migration_rolled_back(tmp_path, monkeypatch):
+    """Test an error during migration leaves the older layout untouched."""
+    _legacy_db(tmp_path, ["2024-01-01T12:00:00+00:00"])
+
+    def fail(self, cursor):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(Storage, "_migrate_legacy_events", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        _storage(tmp_path)
+
+    conn = sqlite3.connect(str(tmp_path / "counts.db"))
+    assert conn.execute("SELECT ts_utc FROM cup_events").fetchall() == [
+        ("2024-01-01T12:00:00+00:00",)
+    ]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
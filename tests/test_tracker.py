@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from core.config import AppConfig
-from core.tracking import ByteTracker
+from core.tracking import ByteTracker, iou_matrix
 
 
 def test_track_creation():
@@ -118,8 +118,40 @@ def test_min_box_area():
     # For now, just verify it doesn't crash
 
 
+def test_iou_matrix_matches_scalar():
+    """Test vectorized IoU agrees with the per-pair computation."""
+    config = AppConfig()
+    tracker = ByteTracker(config)
+
+    boxes_a = [(0.0, 0.0, 10.0, 10.0), (5.0, 5.0, 15.0, 15.0)]
+    boxes_b = [(0.0, 0.0, 10.0, 10.0), (20.0, 20.0, 30.0, 30.0), (10.0, 0.0, 20.0, 10.0)]
+
+    ious = iou_matrix(boxes_a, boxes_b)
+    assert ious.shape == (2, 3)
+    for i, a in enumerate(boxes_a):
+        for j, b in enumerate(boxes_b):
+            assert ious[i, j] == tracker._iou(a, b)
+
+
+def test_track_storage_grows_and_compacts():
+    """Test track rows grow past the initial capacity and expire in order."""
+    config = AppConfig()
+    config.tracking.lost_ttl = 2
+    tracker = ByteTracker(config)
+
+    many = [(20.0 * i, 0.0, 20.0 * i + 15.0, 15.0, 0.9, 41) for i in range(100)]
+    tracked = tracker.update(many)
+    assert [t[6] for t in tracked] == list(range(1, 101))
+    assert list(tracker.tracks) == list(range(1, 101))
+
+    tracker.update([])
+    tracker.update([])
+    tracker.update([(500.0, 500.0, 520.0, 520.0, 0.9, 41)])
+    assert list(tracker.tracks) == [101]
+    assert tracker.tracks[101]["bbox"] == (500.0, 500.0, 520.0, 520.0)
+
+
 if __name__ == "__main__":
     import pytest
 
     pytest.main([__file__, "-v"])
-
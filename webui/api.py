@@ -1,6 +1,8 @@
 """FastAPI web server for UI and API."""
 
 import logging
+import multiprocessing
+import queue
 import threading
 import time
 from datetime import datetime
@@ -11,45 +13,121 @@ from fastapi import FastAPI, Query, WebSocket
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from webui.shared_frame import SharedFrame
 from webui.ws import get_ws_manager
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Cups Counter API")
 
-# Shared state (updated by edge_service)
+# Shared state (updated by edge_service through WebUIBridge)
 _shared_state = None
 
-
-def start_web_server(config, shared_state):
-    """Start web server in background thread."""
+# Preview frame slot attached in the server process
+_frame_reader = None
+_jpeg_cache = (None, None)  # ((slot name, frame_idx), encoded bytes)
+
+# Pending state updates from the edge service; new ones are dropped while
+# it is full (except preview slot announcements, which are re-sent)
+UPDATE_QUEUE_SIZE = 64
+
+
+class WebUIBridge:
+    """Edge-service side of the web UI process.
+
+    Preview frames go through a SharedFrame; other state is sent as small
+    dict updates that the server process merges into its shared state.
+    """
+
+    def __init__(self, process, updates):
+        self.process = process
+        self.updates = updates
+        self._frame = None
+        self._pending_shm = None  # Slot name the server has not been sent yet
+
+    def update(self, **fields):
+        """Merge fields into the web UI state (dropped if the UI lags).
+
+        A preview slot announcement is never dropped: it rides along with
+        later updates until the queue accepts it, since the server would
+        otherwise keep reading a released slot.
+        """
+        if self._pending_shm is not None:
+            fields.setdefault("frame_shm", self._pending_shm)
+        try:
+            self.updates.put_nowait(fields)
+        except queue.Full:
+            if "frame_shm" in fields:
+                self._pending_shm = fields["frame_shm"]
+            return
+        self._pending_shm = None
+
+    def publish_frame(self, frame: np.ndarray):
+        """Copy the preview frame into shared memory."""
+        if self._frame is None or not self._frame.write(frame):
+            # First frame or larger than the current slot
+            if self._frame is not None:
+                self._frame.close()
+            self._frame = SharedFrame(capacity=frame.nbytes)
+            self._frame.write(frame)
+            self.update(frame_shm=self._frame.name)
+        elif self._pending_shm is not None:
+            self.update()
+
+    def close(self):
+        """Stop the server process and release the frame slot."""
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2.0)
+        if self._frame is not None:
+            self._frame.close()
+            self._frame = None
+
+
+def _apply_updates(updates):
+    """Merge state updates from the edge service (server process)."""
+    global _frame_reader
+    while True:
+        fields = updates.get()
+        name = fields.pop("frame_shm", None)
+        if name is not None:
+            # The old slot may still be mid-read by a request; it is released
+            # when the last reference goes away
+            _frame_reader = SharedFrame(name=name)
+        _shared_state.update(fields)
+
+
+def _serve(config, updates):
+    """Server process entry point."""
     global _shared_state
-    _shared_state = shared_state
-    shared_state["start_time"] = time.time()
-
-    def run_server():
-        import uvicorn
-        import asyncio
-
-        # Start WebSocket broadcast when server is ready
-        async def on_startup():
-            manager = get_ws_manager(shared_state)
-            asyncio.create_task(manager.broadcast())
-
-        # Use lifespan events (FastAPI 0.93+)
-        # For compatibility, we'll start broadcast in a separate way
-        # The broadcast will start when first WebSocket connects
-
-        uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=config.ui.http_port,
-            log_level="warning",
-        )
+    import uvicorn
+
+    logging.basicConfig(
+        level=getattr(logging, config.ops.log_level),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    _shared_state = {"stats": {}, "last_update": 0, "start_time": time.time()}
+    threading.Thread(target=_apply_updates, args=(updates,), daemon=True).start()
+
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=config.ui.http_port,
+        log_level="warning",
+    )
+
 
-    server_thread = threading.Thread(target=run_server, daemon=True)
-    server_thread.start()
-    return server_thread
+def start_web_server(config) -> WebUIBridge:
+    """Start the web server in a child process.
+
+    JPEG encoding and request handling then run outside the edge service
+    process and never hold its GIL.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    updates = ctx.Queue(maxsize=UPDATE_QUEUE_SIZE)
+    process = ctx.Process(target=_serve, args=(config, updates), name="webui", daemon=True)
+    process.start()
+    return WebUIBridge(process, updates)
 
 
 @app.get("/")
@@ -131,7 +209,13 @@ async def get_live_frame():
     if _shared_state is None:
         return JSONResponse({"error": "Service not initialized"}, status_code=503)
 
-    frame = _shared_state.get("frame")
+    global _jpeg_cache
+    reader = _frame_reader
+    if reader is not None and _jpeg_cache[0] == (reader.name, reader.frame_idx):
+        # No new frame since the last encode
+        return StreamingResponse(iter([_jpeg_cache[1]]), media_type="image/jpeg")
+
+    frame, frame_idx = reader.read() if reader is not None else (None, 0)
     if frame is None:
         # Return placeholder
         placeholder = cv2.imread("webui/static/placeholder.jpg")
@@ -153,10 +237,11 @@ async def get_live_frame():
             media_type="image/jpeg",
         )
 
-    # Encode frame as JPEG
+    # Encode frame as JPEG (cached until the next published frame)
     _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    _jpeg_cache = ((reader.name, frame_idx), buffer.tobytes())
     return StreamingResponse(
-        iter([buffer.tobytes()]),
+        iter([_jpeg_cache[1]]),
         media_type="image/jpeg",
     )
 
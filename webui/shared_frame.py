@@ -0,0 +1,91 @@
+"""Preview frame handoff between the edge service and the web UI process."""
+
+import logging
+from multiprocessing.shared_memory import SharedMemory
+from typing import Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Header slots (uint64): seq, frame_idx, height, width, channels
+HEADER_FIELDS = 5
+HEADER_BYTES = 64
+
+# Attempts before a reader gives up on a frame being rewritten
+READ_RETRIES = 3
+
+
+class SharedFrame:
+    """Single frame slot in shared memory, guarded by a sequence counter.
+
+    The writer makes seq odd while copying and even when done, so readers
+    in another process can detect (and retry) a torn read without locks.
+    frame_idx counts published frames.
+    """
+
+    def __init__(self, name: str | None = None, capacity: int = 0):
+        """Create a slot holding up to capacity bytes, or attach to name."""
+        self.owner = name is None
+        if self.owner:
+            self.shm = SharedMemory(create=True, size=HEADER_BYTES + capacity)
+        else:
+            # The server process shares the creator's resource tracker, so
+            # the segment is cleaned up once, by the creator's unlink()
+            self.shm = SharedMemory(name=name)
+        self.capacity = self.shm.size - HEADER_BYTES
+        self._header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def frame_idx(self) -> int:
+        return int(self._header[1])
+
+    def write(self, frame: np.ndarray) -> bool:
+        """Copy a uint8 frame into the slot. Returns False if it does not fit."""
+        if frame.nbytes > self.capacity:
+            return False
+
+        header = self._header
+        header[0] += 1  # Odd: write in progress
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_BYTES)
+        np.copyto(view, frame)
+        h, w = frame.shape[:2]
+        header[2:5] = (h, w, frame.shape[2] if frame.ndim == 3 else 1)
+        header[1] += 1
+        header[0] += 1  # Even: frame complete
+        return True
+
+    def read(self) -> Tuple[np.ndarray | None, int]:
+        """Copy out the latest frame.
+
+        Returns:
+            (frame, frame_idx) - frame is None if nothing was published yet
+            or the writer kept overwriting it
+        """
+        header = self._header
+        for _ in range(READ_RETRIES):
+            seq = int(header[0])
+            if seq & 1:
+                continue
+            frame_idx, h, w, c = (int(v) for v in header[1:5])
+            if frame_idx == 0:
+                return None, 0
+            view = np.ndarray((h, w, c), dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_BYTES)
+            frame = view.copy()
+            if int(header[0]) == seq:
+                return frame, frame_idx
+        return None, self.frame_idx
+
+    def close(self):
+        """Detach, and remove the segment if this process created it."""
+        self._header = None
+        try:
+            self.shm.close()
+            if self.owner:
+                self.shm.unlink()
+        except Exception as e:
+            logger.error(f"Error closing shared frame: {e}")